@@ -15,7 +15,9 @@
 #
 # REQUIREMENTS:
 #  - Python >= v2.7
-#  - Pygame v1.9.1 (newer versions come with a broken MIDI implementation)
+#  - Pygame v1.9.1 (newer versions come with a broken MIDI implementation),
+#    only if it is used as the MIDI backend (the default); it is imported by Midi()
+#    when needed. See launchpad_rawmidi.py and launchpad_virtual.py for others.
 #
 #
 # TESTSUITES:
@@ -24,7 +26,8 @@
 #
 #
 # ANYTHING MISSING?
-#  - It's pretty complete, except for this "dual, hidden, shadow" display.
+#  - It's pretty complete. The "dual, hidden, shadow" display is driven by
+#    LedFrameBegin() / LedFrameShow() (or LedCtrlFrame()).
 #
 #
 # KNOWN ISSUES
@@ -32,6 +35,8 @@
 #    will lead to an extreme lag with big buffer sizes.
 #    Unfortunately, the Pygame MIDI implementation does not allow to reduce
 #    the buffer size on mist systems...
+#    Launchpad.StartWriter() hands the messages to a background thread that
+#    merges outdated LED updates instead (see MidiWriter).
 #
 #
 #  >>>
@@ -61,12 +66,11 @@
 #
 #
 
-import string
 import random
 import sys
-
-from pygame import midi
-from pygame import time
+import threading
+from collections import namedtuple, OrderedDict
+from time import sleep
 
 from launchpad_charset import *
 
@@ -77,6 +81,376 @@ MIDI_BUFFER_OUT = 128  # intended for real-time behaviour, but does not have any
 MIDI_BUFFER_IN  = 16   # same here...
 
 
+# a button change, as returned by Launchpad.ButtonEventsXY();
+# <time> is the MIDI time stamp (ms) of the event
+ButtonEvent = namedtuple( "ButtonEvent", "x y pressed time" )
+
+# MIDI ( status, number ) of every button -> its ( x, y ), see the table in Launchpad
+BUTTON_XY = {}
+for _n in range( 0, 128 ):
+	if _n & 0x0f <= 8:
+		BUTTON_XY[ ( 144, _n ) ] = ( _n & 0x0f, ( _n >> 4 ) + 1 )
+for _n in range( 0, 8 ):
+	BUTTON_XY[ ( 176, 104 + _n ) ] = ( _n, 0 )
+del _n
+
+# ( char, offsx, color ) -> the 64 grid color codes that show the character,
+# top row first; filled in by GlyphFrame() as characters are used
+GLYPH_FRAMES = {}
+
+
+#-------------------------------------------------------------------------------------
+#-- character code <char> (0..255) from CHARTAB, shifted right by <offsx>,
+#-- as a grid frame for Launchpad.LedCtrlGrid()
+#-------------------------------------------------------------------------------------
+def GlyphFrame( char, offsx, color ):
+	key = ( char, offsx, color )
+	frame = GLYPH_FRAMES.get( key )
+	if frame is None:
+		frame = []
+		for row in CHARTAB[ char*8 : char*8 + 8 ]:
+			for x in range( 8 ):
+				j = x - offsx
+				frame.append( color if 0 <= j < 8 and row & 0x80 >> j else 0 )
+		frame = GLYPH_FRAMES[ key ] = tuple( frame )
+	return frame
+
+
+#-------------------------------------------------------------------------------------
+#-- <text> as one column bitmap for scrolling: a list with one 8 bit value per
+#-- column, bit <y> set if the LED in row <y> (top = 0) is lit
+#-------------------------------------------------------------------------------------
+def TextColumns( text ):
+	columns = []
+	for char in text:
+		rows = CHARTAB[ max( min( ord(char), 255 ), 0 ) * 8 : ][ :8 ]
+		for j in range( 8 ):
+			columns.append( sum( 1 << y for y in range( 8 ) if rows[y] & 0x80 >> j ) )
+	return columns
+
+
+#-------------------------------------------------------------------------------------
+#-- waits <ms> milliseconds
+#-------------------------------------------------------------------------------------
+def Wait( ms ):
+	sleep( ms / 1000.0 )
+
+
+#-------------------------------------------------------------------------------------
+#-- the default MIDI backend, pygame.midi; only imported once a Midi() needs it
+#-------------------------------------------------------------------------------------
+def PygameMidi():
+	from pygame import midi
+	return midi
+
+
+# output priorities for Midi.SetPriority(): game state goes out before effects
+PRIORITY_STATE  = 0
+PRIORITY_EFFECT = 1
+
+
+
+# moves the rapid update cursor back to the first LED, see LedCtrlRapidHome()
+RAPID_HOME = ( 176, 0, 1 )
+
+
+#-------------------------------------------------------------------------------------
+#-- position of a LED message's LED in a rapid update (grid, side column, automap)
+#-------------------------------------------------------------------------------------
+def RapidIndex( stat, dat1 ):
+	if stat == 176:
+		return 72 + dat1 - 104
+	if dat1 & 0x0f == 8:
+		return 64 + ( dat1 >> 4 )
+	return ( dat1 >> 4 ) * 8 + ( dat1 & 0x0f )
+
+
+
+########################################################################################
+### CLASS MidiWriter
+### Sends MIDI messages from a background thread, so writers never wait for the device
+########################################################################################
+class MidiWriter( threading.Thread ):
+
+	# Messages wait in one queue per priority and PRIORITY_STATE always goes
+	# first. A queued LED message is replaced by a newer one for the same LED,
+	# so only the latest colour is sent. Any other message (buffer control,
+	# ...) is sent in order and ends the stretch of LED messages that later
+	# ones may replace. A Reset drops everything still waiting.
+	# A rapid update right after LedCtrlRapidHome() is a whole frame: a newer
+	# frame of the same size drops the one still waiting, together with the
+	# LED messages queued after it that the new frame paints over.
+
+	def __init__( self, send, flush = None ):
+		threading.Thread.__init__( self )
+		self.daemon   = True
+		self.send     = send       # send( stat, dat1, dat2 ), e.g. write_short
+		self.flush    = flush      # called whenever the queue has run empty
+		self.lock     = threading.Condition()
+		self.queues   = [ OrderedDict(), OrderedDict() ]
+		self.sealed   = [ 0, 0 ]   # bumped by every message that is not a LED one
+		self.frames   = [ None, None ]   # ( key, sealed after it ) of the last frame
+		self.depth    = 0          # messages waiting
+		self.sending  = 0          # messages being sent right now
+		self.stopping = False
+
+
+	#-------------------------------------------------------------------------------------
+	#-- queues a list of [ stat, dat1, dat2 ] messages that are sent back to back
+	#-------------------------------------------------------------------------------------
+	def Put( self, messages, priority = PRIORITY_STATE ):
+		with self.lock:
+			if len( messages ) == 1 and tuple( messages[0] ) == ( 176, 0, 0 ):
+				# a reset makes everything before it pointless
+				self.queues = [ OrderedDict(), OrderedDict() ]
+				self.frames = [ None, None ]
+				self.depth  = 0
+
+			queue = self.queues[ priority ]
+			if queue and len( messages ) > 1 and all( msg[0] == 146 for msg in messages ):
+				lastKey = next( reversed( queue ) )
+				if queue[ lastKey ] == [ RAPID_HOME ]:
+					# the rapid update that follows LedCtrlRapidHome() is one frame with it
+					del queue[ lastKey ]
+					self.depth -= 1
+					self.sealed[ priority ] -= 1    # taken back: it no longer stands alone
+					messages = [ RAPID_HOME ] + list( messages )
+
+			led = self.LedKey( messages )
+			if led is not None and led[0] == "frame":
+				self.DropFrame( priority, led[1] )
+				key = ( self.sealed[ priority ], ) + led
+				# later LED messages must not be merged into ones before the frame
+				self.sealed[ priority ] += 1
+				self.frames[ priority ] = ( key, self.sealed[ priority ] )
+			elif led is None:
+				self.sealed[ priority ] += 1
+				key = ( self.sealed[ priority ], )
+			else:
+				key = ( self.sealed[ priority ], ) + led
+				if priority == PRIORITY_STATE:
+					# a pending effect must not paint over the game afterwards
+					for effectKey in list( self.queues[ PRIORITY_EFFECT ] ):
+						if effectKey[1:] == led:
+							self.depth -= len( self.queues[ PRIORITY_EFFECT ].pop( effectKey ) )
+			self.depth -= len( queue.get( key, [] ) )
+			queue[ key ] = messages
+			self.depth += len( messages )
+			self.lock.notify_all()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- ( stat, dat1 ) for a single LED message, ( "frame", size ) for a rapid update
+	#-- that starts at the first LED, None for anything else
+	#-------------------------------------------------------------------------------------
+	@staticmethod
+	def LedKey( messages ):
+		if len( messages ) > 1 and tuple( messages[0] ) == RAPID_HOME:
+			if all( msg[0] == 146 for msg in messages[1:] ):
+				return ( "frame", len( messages ) - 1 )
+			return None
+		if len( messages ) != 1:
+			return None
+		stat, dat1, dat2 = messages[0]
+		if stat == 144 or ( stat == 176 and 104 <= dat1 <= 111 ):
+			return ( stat, dat1 )
+		return None
+
+
+	#-------------------------------------------------------------------------------------
+	#-- a new frame of <size> rapid messages is coming: drops the last frame of that
+	#-- size if it still waits and nothing but LED messages came after it
+	#-------------------------------------------------------------------------------------
+	def DropFrame( self, priority, size ):
+		if self.frames[ priority ] is None:
+			return
+		key, sealed = self.frames[ priority ]
+		queue = self.queues[ priority ]
+		if key[2] != size or sealed != self.sealed[ priority ] or key not in queue:
+			return
+		self.depth -= len( queue.pop( key ) )
+		for ledKey in list( queue ):
+			if ledKey[0] == sealed and RapidIndex( ledKey[1], ledKey[2] ) < 2 * size:
+				self.depth -= len( queue.pop( ledKey ) )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- number of messages still waiting to be sent
+	#-------------------------------------------------------------------------------------
+	def Depth( self ):
+		with self.lock:
+			return self.depth
+
+
+	#-------------------------------------------------------------------------------------
+	#-- waits until everything queued so far has been sent
+	#-------------------------------------------------------------------------------------
+	def Flush( self ):
+		with self.lock:
+			while self.depth > 0 or self.sending > 0:
+				self.lock.wait()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- sends what is left and ends the thread
+	#-------------------------------------------------------------------------------------
+	def Stop( self ):
+		with self.lock:
+			self.stopping = True
+			self.lock.notify_all()
+		self.join()
+
+
+	def run( self ):
+		while True:
+			with self.lock:
+				while self.depth == 0 and not self.stopping:
+					self.lock.wait()
+				if self.depth == 0:
+					return
+				queue = self.queues[ PRIORITY_STATE ] or self.queues[ PRIORITY_EFFECT ]
+				key, messages = queue.popitem( False )
+				self.depth  -= len( messages )
+				self.sending = len( messages )
+
+			try:
+				for stat, dat1, dat2 in messages:
+					self.send( stat, dat1, dat2 )
+				if self.flush is not None and self.depth == 0:
+					self.flush()
+			finally:
+				with self.lock:
+					self.sending = 0
+					self.lock.notify_all()
+
+
+
+########################################################################################
+### CLASS MidiStats
+### Opt-in traffic counters for Midi, see Midi.EnableStats()
+########################################################################################
+class MidiStats:
+
+	# upper ends (ms) of the press-to-LED latency histogram; the last bucket is open
+	LATENCY_BUCKETS = [ 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000 ]
+
+	def __init__( self, clock, logInterval = 0, log = None ):
+		self.clock         = clock          # MIDI time in ms, the clock of the event time stamps
+		self.logInterval   = logInterval    # seconds between log lines, 0 for none
+		self.log           = log or self.Print
+		self.lock          = threading.Lock()
+		self.started       = clock()
+		self.lastLog       = self.started
+		self.out           = {}             # API -> [ messages, bytes ] written
+		self.into          = {}             # API -> [ messages, bytes ] read
+		self.queueDepth    = 0
+		self.maxQueueDepth = 0
+		self.presses       = []             # time stamps of presses not answered by a LED yet
+		self.latency       = [ 0 ] * ( len( self.LATENCY_BUCKETS ) + 1 )
+
+
+	@staticmethod
+	def Print( line ):
+		print( line )
+		sys.stdout.flush()
+
+
+	@staticmethod
+	def Count( table, api, messages, size ):
+		entry = table.setdefault( api, [ 0, 0 ] )
+		entry[0] += messages
+		entry[1] += size
+
+
+	def Wrote( self, api, messages, size, queueDepth ):
+		with self.lock:
+			self.Count( self.out, api, messages, size )
+			self.queueDepth    = queueDepth
+			self.maxQueueDepth = max( self.maxQueueDepth, queueDepth )
+		self.MaybeLog()
+
+
+	def Read( self, api, events ):
+		with self.lock:
+			self.Count( self.into, api, len( events ), 3 * len( events ) )
+			for msg, stamp in events:
+				if msg[0] in ( 144, 176 ) and msg[2] > 0:
+					self.presses.append( stamp )
+		self.MaybeLog()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- a LED message has gone out to the device: answers every press waiting
+	#-------------------------------------------------------------------------------------
+	def LedSent( self ):
+		if not self.presses:
+			return
+		now = self.clock()
+		with self.lock:
+			for stamp in self.presses:
+				ms = now - stamp
+				bucket = 0
+				while bucket < len( self.LATENCY_BUCKETS ) and ms > self.LATENCY_BUCKETS[ bucket ]:
+					bucket += 1
+				self.latency[ bucket ] += 1
+			self.presses = []
+
+
+	#-------------------------------------------------------------------------------------
+	#-- everything counted so far as a dictionary
+	#-------------------------------------------------------------------------------------
+	def Snapshot( self ):
+		with self.lock:
+			seconds = max( ( self.clock() - self.started ) / 1000.0, 0.001 )
+			def rates( table ):
+				return dict( ( api, { "messages": n, "bytes": size,
+				                      "messagesPerSecond": n / seconds,
+				                      "bytesPerSecond": size / seconds } )
+				             for api, ( n, size ) in table.items() )
+			labels = [ "<=%d" % ms for ms in self.LATENCY_BUCKETS ] + \
+			         [ ">%d" % self.LATENCY_BUCKETS[-1] ]
+			return { "seconds": seconds,
+			         "out": rates( self.out ),
+			         "in": rates( self.into ),
+			         "queueDepth": self.queueDepth,
+			         "maxQueueDepth": self.maxQueueDepth,
+			         "latencyMs": dict( zip( labels, self.latency ) ) }
+
+
+	#-------------------------------------------------------------------------------------
+	#-- the snapshot as one line of text
+	#-------------------------------------------------------------------------------------
+	def LogLine( self ):
+		snap = self.Snapshot()
+		def total( table, key ):
+			return sum( entry[ key ] for entry in table.values() )
+		busiest = sorted( snap["out"].items(), key = lambda item: -item[1]["messages"] )[:4]
+		line = "MIDI %.1fs out %.1f msg/s %.0f B/s [%s] in %.1f msg/s queue %d/%d" % (
+			snap["seconds"],
+			total( snap["out"], "messagesPerSecond" ), total( snap["out"], "bytesPerSecond" ),
+			", ".join( "%s %.1f" % ( api, entry["messagesPerSecond"] ) for api, entry in busiest ),
+			total( snap["in"], "messagesPerSecond" ),
+			snap["queueDepth"], snap["maxQueueDepth"] )
+		answered = sum( self.latency )
+		if answered:
+			# the bucket holding the median press
+			seen = 0
+			for bucket, count in enumerate( self.latency ):
+				seen += count
+				if seen * 2 >= answered:
+					break
+			line += " press->LED n=%d median %s ms" % ( answered,
+				"<=%d" % self.LATENCY_BUCKETS[ bucket ] if bucket < len( self.LATENCY_BUCKETS )
+				else ">%d" % self.LATENCY_BUCKETS[-1] )
+		return line
+
+
+	def MaybeLog( self ):
+		if self.logInterval and self.clock() - self.lastLog >= self.logInterval * 1000:
+			self.lastLog = self.clock()
+			self.log( self.LogLine() )
+
+
 
 ########################################################################################
 ### CLASS Midi
@@ -86,38 +460,68 @@ class Midi:
 
 	#-------------------------------------------------------------------------------------
 	#-- init
+	#-- <backend> provides the MIDI functions. It has the same interface as pygame.midi:
+	#--   init(), get_count(), get_device_info( n ), time(),
+	#--   Output( id, latency, buffer ) -> write_short( s, d1, d2 ), write( table ), close()
+	#--   Input( id, buffer )           -> poll(), read( count ), close()
+	#-- An Output may also have flush(), if it collects messages until then.
+	#-- Default: pygame.midi. Others: launchpad_rawmidi.RawMidi (a raw MIDI device
+	#-- file, no pygame needed) and launchpad_virtual.VirtualLaunchpad (no device).
 	#-------------------------------------------------------------------------------------
-	def __init__( self ):
+	def __init__( self, backend = None ):
 
-		self.devIn  = None
-		self.devOut = None
+		self.devIn    = None
+		self.devOut   = None
+		self.writer   = None            # MidiWriter, once StartWriter() was called
+		self.priority = PRIORITY_STATE
+		self.backend  = backend or PygameMidi()
+		self.stats    = None            # MidiStats, once EnableStats() was called
+		self.batch    = 0               # BeginBatch() nesting
+		self.devices  = None            # get_device_info() of every device, see Devices()
 
-		midi.init()
+		self.backend.init()
 
 		# TODO: this sucks...
 		try:
-			midi.get_count()
+			self.backend.get_count()
 		except:
 			print("ERROR: MIDI not available...")
 
 
+	#-------------------------------------------------------------------------------------
+	#-- returns ( interface, name, input, output ) of every MIDI device, by id.
+	#-- The backend is only asked once; Rescan() makes it ask again (e.g. after a
+	#-- device was plugged in).
+	#-------------------------------------------------------------------------------------
+	def Devices( self ):
+		if self.devices is None:
+			self.devices = []
+			for n in range( self.backend.get_count() ):
+				md = self.backend.get_device_info( n )
+				# names are bytes in Python 3
+				devName = md[1].decode( "latin-1" ) if isinstance( md[1], bytes ) else md[1]
+				self.devices.append( ( md[0], devName, md[2], md[3] ) )
+		return self.devices
+
+
+	def Rescan( self ):
+		self.devices = None
+
+
 	#-------------------------------------------------------------------------------------
 	#-- returns a list of devices that matches the string 'name' and has in- or outputs
 	#-------------------------------------------------------------------------------------
 	def SearchDevices( self, name, output = True, input = True, quiet = True ):
 		ret = []
-		i = 0
-		for n in range( midi.get_count() ):
-			md = midi.get_device_info( n )
+		for i, md in enumerate( self.Devices() ):
 			if quiet == False:
 				print(md)
 				sys.stdout.flush()
-			if string.find( md[1], name ) >= 0:
+			if md[1].find( name ) >= 0:
 				if output == True and md[3] > 0:
 					ret.append( i )
 				if input == True and md[2] > 0:
 					ret.append( i )
-			i += 1
 
 		return ret
 
@@ -138,7 +542,7 @@ class Midi:
 	#-------------------------------------------------------------------------------------
 	def OpenOutput( self, midi_id ):
 		if self.devOut is None:
-			self.devOut = midi.Output( midi_id, 0, MIDI_BUFFER_OUT )
+			self.devOut = self.backend.Output( midi_id, 0, MIDI_BUFFER_OUT )
 
 
 	#-------------------------------------------------------------------------------------
@@ -146,7 +550,7 @@ class Midi:
 	#-------------------------------------------------------------------------------------
 	def CloseOutput( self ):
 		if self.devOut is not None:
-			self.Output.close( self.devOut )
+			self.devOut.close()
 			self.devOut = None
 
 
@@ -155,23 +559,23 @@ class Midi:
 	#-------------------------------------------------------------------------------------
 	def OpenInput( self, midi_id ):
 		if self.devIn is None:
-			self.devIn = midi.Input( midi_id, MIDI_BUFFER_IN )
+			self.devIn = self.backend.Input( midi_id, MIDI_BUFFER_IN )
 
 
 	#-------------------------------------------------------------------------------------
 	#--
 	#-------------------------------------------------------------------------------------
 	def CloseInput( self ):
-	  if self.devIn is not None:
-	    midi.Input.close( self.devIn )
-	    self.devIn = None
+		if self.devIn is not None:
+			self.devIn.close()
+			self.devIn = None
 
 
 	#-------------------------------------------------------------------------------------
 	#-- Return MIDI time
 	#-------------------------------------------------------------------------------------
 	def GetTime( self ):
-		return midi.time()
+		return self.backend.time()
 
 			
 	#-------------------------------------------------------------------------------------
@@ -185,14 +589,115 @@ class Midi:
 	#--
 	#-------------------------------------------------------------------------------------
 	def ReadRaw( self ):
-		return self.devIn.read( 1 )
+		events = self.devIn.read( 1 )
+		if self.stats is not None:
+			self.stats.Read( self.Caller(), events )
+		return events
+
+
+	#-------------------------------------------------------------------------------------
+	#-- reads up to <count> pending messages at once
+	#-------------------------------------------------------------------------------------
+	def ReadRawMulti( self, count = MIDI_BUFFER_IN ):
+		events = self.devIn.read( count )
+		if self.stats is not None:
+			self.stats.Read( self.Caller(), events )
+		return events
 
 
 	#-------------------------------------------------------------------------------------
 	#-- sends a single, short message
 	#-------------------------------------------------------------------------------------
 	def RawWrite( self, stat, dat1, dat2 ):
+		if self.stats is not None:
+			self.stats.Wrote( self.Caller(), 1, 3, self.QueueDepth() )
+		if self.writer is not None:
+			self.writer.Put( [ ( stat, dat1, dat2 ) ], self.priority )
+		else:
+			self.Send( stat, dat1, dat2 )
+			if self.batch == 0:
+				self.Flush()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- hands a message to the device, right now
+	#-------------------------------------------------------------------------------------
+	def Send( self, stat, dat1, dat2 ):
 		self.devOut.write_short( stat, dat1, dat2 )
+		if self.stats is not None and stat in ( 144, 146, 176 ):
+			self.stats.LedSent()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- pushes out whatever the output collected (only some backends collect)
+	#-------------------------------------------------------------------------------------
+	def Flush( self ):
+		flush = getattr( self.devOut, "flush", None )
+		if flush is not None:
+			flush()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Messages up to the matching EndBatch() may be sent together (e.g. in a single
+	#-- write() with launchpad_rawmidi). Pairs can be nested.
+	#-------------------------------------------------------------------------------------
+	def BeginBatch( self ):
+		self.batch += 1
+
+
+	def EndBatch( self ):
+		self.batch = max( self.batch - 1, 0 )
+		if self.batch == 0 and self.writer is None:
+			self.Flush()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- sends a list of short messages, [ [ stat, dat1, dat2 ], ... ], back to back;
+	#-- the writer thread never puts anything in between them
+	#-------------------------------------------------------------------------------------
+	def RawWriteSequence( self, messages ):
+		if self.stats is not None:
+			self.stats.Wrote( self.Caller(), len( messages ), 3 * len( messages ), self.QueueDepth() )
+		if self.writer is not None:
+			self.writer.Put( [ tuple( msg ) for msg in messages ], self.priority )
+		else:
+			for stat, dat1, dat2 in messages:
+				self.Send( stat, dat1, dat2 )
+			if self.batch == 0:
+				self.Flush()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- From now on, messages are queued and sent by a background thread.
+	#-------------------------------------------------------------------------------------
+	def StartWriter( self ):
+		if self.writer is None:
+			self.writer = MidiWriter( self.Send, self.Flush )
+			self.writer.start()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Sends what is still queued, then writes directly again.
+	#-------------------------------------------------------------------------------------
+	def StopWriter( self ):
+		if self.writer is not None:
+			self.writer.Stop()
+			self.writer = None
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Sets the priority of the following messages, returns the previous one.
+	#-------------------------------------------------------------------------------------
+	def SetPriority( self, priority ):
+		previous, self.priority = self.priority, priority
+		return previous
+
+
+	#-------------------------------------------------------------------------------------
+	#-- number of messages waiting for the writer thread
+	#-------------------------------------------------------------------------------------
+	def QueueDepth( self ):
+		return self.writer.Depth() if self.writer is not None else 0
 
 		
 	#-------------------------------------------------------------------------------------
@@ -200,9 +705,56 @@ class Midi:
 	#-- Amount of <dat> bytes is arbitrary.
 	#-- [ [ [stat, <dat1>, <dat2>, <dat3>], timestamp ],  [...], ... ]
 	#-- <datN> fields are optional
+	#-- With the writer running, the messages are queued like RawWriteSequence()'s;
+	#-- timestamps and <dat3> are dropped then (the Launchpad uses neither).
 	#-------------------------------------------------------------------------------------
 	def RawWriteMulti( self, msgTable ):
+		if self.stats is not None:
+			self.stats.Wrote( self.Caller(), len( msgTable ),
+			                  sum( len( msg ) for msg, stamp in msgTable ), self.QueueDepth() )
+		if self.writer is not None:
+			self.writer.Put( [ tuple( ( list( msg ) + [ 0, 0 ] )[ :3 ] ) for msg, stamp in msgTable ],
+			                 self.priority )
+			return
 		self.devOut.write( msgTable )
+		if self.batch == 0:
+			self.Flush()
+		if self.stats is not None:
+			self.stats.LedSent()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Starts counting messages and bytes per Launchpad call, the output queue depth
+	#-- and how long button presses take to get a LED answer. Every <logInterval>
+	#-- seconds (0: never) a summary line goes to <log> (default: print).
+	#-- Returns the MidiStats; its Snapshot() has the numbers.
+	#-------------------------------------------------------------------------------------
+	def EnableStats( self, logInterval = 0, log = None ):
+		self.stats = MidiStats( self.GetTime, logInterval, log )
+		return self.stats
+
+
+	def DisableStats( self ):
+		self.stats = None
+
+
+	#-------------------------------------------------------------------------------------
+	#-- the Launchpad method a message belongs to: the outermost one on the stack,
+	#-- so LedCtrlString gets the messages of the LedCtrlChar calls it makes
+	#-------------------------------------------------------------------------------------
+	def Caller( self ):
+		frame = sys._getframe( 1 )
+		api   = frame.f_code.co_name
+		inLaunchpad = False
+		while frame is not None:
+			owner = frame.f_locals.get( "self" )
+			if isinstance( owner, Launchpad ):
+				api = frame.f_code.co_name
+				inLaunchpad = True
+			elif inLaunchpad or not isinstance( owner, Midi ):
+				break
+			frame = frame.f_back
+		return api
 	
 	
 
@@ -264,10 +816,22 @@ class Launchpad:
 	# +---+---+---+---+---+---+---+---+  +---+
 	#
 	
-	def __init__( self ):
-		self.midi   = Midi() # midi interface class
+	#-------------------------------------------------------------------------------------
+	#-- <backend>: see Midi; pygame.midi unless told otherwise
+	#-------------------------------------------------------------------------------------
+	def __init__( self, backend = None ):
+		self.midi   = Midi( backend ) # midi interface class
 		self.idOut  = None   # midi id for output
 		self.idIn   = None   # midi id for input
+		self.found  = None   # ( name, number ) the ids above were found for
+
+		# the LED buffer on display and the one LED messages go to (0 or 1)
+		self.displayBuffer = 0
+		self.updateBuffer  = 0
+
+		# the 64 grid colors LedCtrlGrid() drew last; None once anything else
+		# may have changed the grid
+		self.grid = None
 
 		# just in case someone likes "defines" ;)
 		SCROLL_NONE  =  0
@@ -285,14 +849,23 @@ class Launchpad:
 		
 
 	#-------------------------------------------------------------------------------------
-	#-- opens the first-found Launchpad MIDI devices (one in, one out)
+	#-- opens the MIDI devices (one in, one out) of Launchpad <number>: 0 is the first
+	#-- device whose name contains <name>, 1 the second one...
+	#-- Opening the same Launchpad again (after Close()) reuses the ids found the first
+	#-- time; the device list is only searched again after a failed Open().
 	#-------------------------------------------------------------------------------------
-	def Open( self ):
-		self.idOut = self.midi.SearchDevice("Launchpad", True, False )
-		self.idIn  = self.midi.SearchDevice("Launchpad", False, True )
-		
-		if self.idOut is None or self.idIn is None:
-			return False
+	def Open( self, number = 0, name = "Launchpad" ):
+		if self.found != ( name, number ):
+			outputs = self.midi.SearchDevices( name, True, False )
+			inputs  = self.midi.SearchDevices( name, False, True )
+
+			if len( outputs ) <= number or len( inputs ) <= number:
+				self.midi.Rescan()
+				return False
+
+			self.idOut = outputs[ number ]
+			self.idIn  = inputs[ number ]
+			self.found = ( name, number )
 
 		self.midi.OpenOutput( self.idOut )
 		self.midi.OpenInput( self.idIn )
@@ -301,16 +874,43 @@ class Launchpad:
 
 
 	#-------------------------------------------------------------------------------------
-	#-- Closes everything
+	#-- Closes everything: sends what the writer thread still holds, then releases
+	#-- both MIDI ports. Open() opens them again.
 	#-------------------------------------------------------------------------------------
 	def Close( self ):
-		None
+		self.midi.StopWriter()
+		self.midi.CloseOutput()
+		self.midi.CloseInput()
+		self.grid = None
+
+
+	#-------------------------------------------------------------------------------------
+	#-- LED messages are sent from a background thread from now on (see MidiWriter);
+	#-- Close() sends what is left.
+	#-------------------------------------------------------------------------------------
+	def StartWriter( self ):
+		self.midi.StartWriter()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- number of messages still waiting to be sent
+	#-------------------------------------------------------------------------------------
+	def QueueDepth( self ):
+		return self.midi.QueueDepth()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- starts counting MIDI traffic, see Midi.EnableStats()
+	#-------------------------------------------------------------------------------------
+	def EnableStats( self, logInterval = 0, log = None ):
+		return self.midi.EnableStats( logInterval, log )
 	
 
 	#-------------------------------------------------------------------------------------
 	#-- prints a list of all devices to the console (for debug)
 	#-------------------------------------------------------------------------------------
 	def ListAll( self ):
+		self.midi.Rescan()
 		self.midi.SearchDevices("*", True, True, False )
 
 
@@ -318,7 +918,58 @@ class Launchpad:
 	#-- reset the Launchpad
 	#-------------------------------------------------------------------------------------
 	def Reset( self ):
-		self.midi.RawWrite( 176, 0, 0 )
+		self.midi.RawWrite( 176, 0, 0 )    # also drops whatever the writer thread still holds
+		self.displayBuffer = 0
+		self.updateBuffer  = 0
+		self.grid          = None
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Selects the LED buffer on display (<display>) and the one that LED messages
+	#-- are written to (<update>); both 0 or 1.
+	#-- <copy> copies the new display buffer into the new update buffer.
+	#-- <flash> lets the Launchpad alternate between both buffers by itself.
+	#-------------------------------------------------------------------------------------
+	def LedCtrlBuffer( self, display, update, copy = False, flash = False ):
+		self.displayBuffer = display
+		self.updateBuffer  = update
+		self.grid          = None
+		self.midi.RawWrite( 176, 0, 32 + 16*bool(copy) + 8*bool(flash) + 4*update + display )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Shows the update buffer and writes to the buffer that was on display.
+	#-------------------------------------------------------------------------------------
+	def LedBufferSwap( self, copy = False ):
+		self.LedCtrlBuffer( self.updateBuffer, self.displayBuffer, copy )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Starts a frame: LED messages now go to the hidden buffer, which starts out
+	#-- as a copy of the one on display. Nothing visible changes until LedFrameShow().
+	#-------------------------------------------------------------------------------------
+	def LedFrameBegin( self ):
+		self.midi.BeginBatch()
+		self.LedCtrlBuffer( self.displayBuffer, 1 - self.displayBuffer, True )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Shows the frame started by LedFrameBegin() in a single message.
+	#-- LED messages go straight to the display again afterwards.
+	#-------------------------------------------------------------------------------------
+	def LedFrameShow( self ):
+		self.LedCtrlBuffer( self.updateBuffer, self.updateBuffer )
+		self.midi.EndBatch()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Draws a list of LEDs, [ [ x, y, red, green ], ... ], all at once.
+	#-------------------------------------------------------------------------------------
+	def LedCtrlFrame( self, leds ):
+		self.LedFrameBegin()
+		for x, y, red, green in leds:
+			self.LedCtrlXY( x, y, red, green )
+		self.LedFrameShow()
 
 
 	#-------------------------------------------------------------------------------------
@@ -356,6 +1007,7 @@ class Launchpad:
 			led = self.LedGetColor( red, green )
 			
 			self.midi.RawWrite( 144, number, led )
+			self.grid = None
 
 
 	#-------------------------------------------------------------------------------------
@@ -387,9 +1039,10 @@ class Launchpad:
 	#-------------------------------------------------------------------------------------
 	def LedCtrlRawRapid( self, allLeds ):
 		le = len( allLeds )
+		self.grid = None
 
-		for i in range( 0, le, 2 ):
-			self.midi.RawWrite( 146, allLeds[i], allLeds[i+1] if i+1 < le else 0 )
+		self.midi.RawWriteSequence( [ [ 146, allLeds[i], allLeds[i+1] if i+1 < le else 0 ]
+		                              for i in range( 0, le, 2 ) ] )
 
 #   This fast version does not work, because the Launchpad gets confused
 #   by the timestamps...
@@ -409,6 +1062,14 @@ class Launchpad:
 #		self.midi.RawWriteMulti( [ tmsg ] )
 
 
+	#-------------------------------------------------------------------------------------
+	#-- Moves the LedCtrlRawRapid() cursor back to LED1 (top left).
+	#-- Selecting the X-Y grid layout again does that without touching any LED.
+	#-------------------------------------------------------------------------------------
+	def LedCtrlRapidHome( self ):
+		self.midi.RawWrite( 176, 0, 1 )
+
+
 	#-------------------------------------------------------------------------------------
 	#-- Controls an automap LED <number>; with <green/red> brightness: 0..3
 	#-- NOTE: In here, number is 0..7 (left..right)
@@ -428,47 +1089,98 @@ class Launchpad:
 	#-------------------------------------------------------------------------------------
 	def LedAllOn( self ):
 		self.midi.RawWrite( 176, 0, 127 )
+		self.grid = None
+
+
+	#-------------------------------------------------------------------------------------
+	#-- Shows 64 color codes (see LedGetColor()) on the 8x8 grid, top row first.
+	#-- Only the LEDs that differ from the last LedCtrlGrid() call are sent, or
+	#-- the whole grid as a rapid update if that takes fewer messages.
+	#-------------------------------------------------------------------------------------
+	def LedCtrlGrid( self, leds ):
+		if self.grid is None:
+			changed = range( 64 )
+		else:
+			changed = [ i for i in range( 64 ) if leds[i] != self.grid[i] ]
+
+		self.midi.BeginBatch()
+		try:
+			if len( changed ) > 32:
+				self.LedCtrlRapidHome()
+				self.LedCtrlRawRapid( leds[:64] )
+			else:
+				for i in changed:
+					self.midi.RawWrite( 144, ( i >> 3 ) << 4 | ( i & 7 ), leds[i] )
+		finally:
+			self.midi.EndBatch()
+
+		self.grid = tuple( leds[:64] )
 
 		
 	#-------------------------------------------------------------------------------------
 	#-- Sends character <char> in colors <red/green> and lateral offset <offsx> (-8..8)
 	#-- to the Launchpad. <offsy> does not have yet any function
+	#-- The frame for each character and offset is only worked out once (GlyphFrame()),
+	#-- and only the LEDs that changed since the last character are sent.
 	#-------------------------------------------------------------------------------------
 	def LedCtrlChar( self, char, red, green, offsx = 0, offsy = 0 ):
 		char = ord(char)
 		char = min( char, 255)
-		char = max( char, 0) * 8
-
-		for i in range(0, 8*16, 16):
-			for j in range(8):
-				sum = i + j + offsx
-				if sum >= i and sum < i + 8:
-					if CHARTAB[char]  &  0x80 >> j:
-						self.LedCtrlRaw( sum, red, green )
-					else:
-						self.LedCtrlRaw( sum, 0, 0 )
-			char += 1
+		char = max( char, 0)
+
+		# text is decoration; game updates go out first
+		priority = self.midi.SetPriority( PRIORITY_EFFECT )
+		try:
+			self.LedCtrlGrid( GlyphFrame( char, offsx, self.LedGetColor( red, green ) ) )
+		finally:
+			self.midi.SetPriority( priority )
 					
 
 	#-------------------------------------------------------------------------------------
-	#-- Scroll a string, as fast as we can, over the Launch pad.
+	#-- Scroll a string over the Launchpad, <fps> frames per second (0: as fast as we can).
 	#-- Dir specifies: -1 to left, 0 no scroll, 1 to right
-	#-- The "no scroll" characters are sent 8 times to have a comparable speed.
+	#-- The "no scroll" characters are shown for 4 frames to have a comparable speed.
+	#-- The whole string is drawn into one column bitmap first; scrolling moves an 8
+	#-- column window over it, and LedCtrlGrid() only sends the LEDs that changed.
 	#-------------------------------------------------------------------------------------
-	def LedCtrlString( self, str, red, green, dir = 0 ):
+	def LedCtrlString( self, str, red, green, dir = 0, fps = 25 ):
+		led = self.LedGetColor( red, green )
+		blank = [ 0 ] * 8
 
-		if dir == -1:
-			for i in str:
-				for off in range(5,-8,-1):
-					self.LedCtrlChar(i, red, green, off)
-		elif dir == 0:
-			for i in str:
-				for off in range(4):
-					self.LedCtrlChar(i, red, green)
-		elif dir == 1:
+		if dir == 0:
 			for i in str:
-				for off in range(-5,8):
-					self.LedCtrlChar(i, red, green, off)
+				self.LedCtrlColumns( TextColumns( i ), led )
+				self.LedFrameWait( fps, 4 )
+			return
+
+		if dir == -1:
+			columns = blank + TextColumns( str ) + blank
+			starts = range( 0, len( columns ) - 7 )
+		else:
+			# the first character comes in from the left, so it ends up rightmost
+			columns = blank + TextColumns( str[::-1] ) + blank
+			starts = range( len( columns ) - 8, -1, -1 )
+
+		for start in starts:
+			self.LedCtrlColumns( columns[ start : start + 8 ], led )
+			self.LedFrameWait( fps )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- shows 8 bitmap columns (see TextColumns()) in color code <led>
+	#-------------------------------------------------------------------------------------
+	def LedCtrlColumns( self, columns, led ):
+		priority = self.midi.SetPriority( PRIORITY_EFFECT )
+		try:
+			self.LedCtrlGrid( [ led if columns[x] >> y & 1 else 0
+			                    for y in range( 8 ) for x in range( 8 ) ] )
+		finally:
+			self.midi.SetPriority( priority )
+
+
+	def LedFrameWait( self, fps, frames = 1 ):
+		if fps:
+			Wait( int( frames * 1000 / fps ) )
 
 					
 	#-------------------------------------------------------------------------------------
@@ -484,8 +1196,8 @@ class Launchpad:
 	#-------------------------------------------------------------------------------------
 	def ButtonStateRaw( self ):
 		if self.midi.ReadCheck():
-			a = self.midi.ReadRaw()
-			return [ a[0][0][1] if a[0][0][0] == 144 else a[0][0][1] + 96, True if a[0][0][2] > 0 else False ]
+			( status, number, value, _ ), stamp = self.midi.ReadRaw()[0]
+			return [ number if status == 144 else number + 96, value > 0 ]
 		else:
 			return []
 
@@ -496,19 +1208,29 @@ class Launchpad:
 	#-------------------------------------------------------------------------------------
 	def ButtonStateXY( self ):
 		if self.midi.ReadCheck():
-			a = self.midi.ReadRaw()
-
-			if a[0][0][0] == 144:
-				x = a[0][0][1] & 0x0f
-				y = ( a[0][0][1] & 0xf0 ) >> 4
-				
-				return [ x, y+1, True if a[0][0][2] > 0 else False ]
-				
-			elif a[0][0][0] == 176:
-				return [ a[0][0][1] - 104, 0, True if a[0][0][2] > 0 else False ]
+			( status, number, value, _ ), stamp = self.midi.ReadRaw()[0]
+			xy = BUTTON_XY.get( ( status, number ) )
+			if xy is not None:
+				return [ xy[0], xy[1], value > 0 ]
 				
 		return []
 
+
+	#-------------------------------------------------------------------------------------
+	#-- Returns all button changes since the last call, oldest first, as a list of
+	#-- ButtonEvent( x, y, pressed, time ). Empty if nothing happened.
+	#-- Reads the whole input queue in as few calls as possible, so a burst of
+	#-- presses arrives together instead of one per poll.
+	#-------------------------------------------------------------------------------------
+	def ButtonEventsXY( self ):
+		events = []
+		while self.midi.ReadCheck():
+			for ( status, number, value, _ ), stamp in self.midi.ReadRawMulti( MIDI_BUFFER_IN ):
+				xy = BUTTON_XY.get( ( status, number ) )
+				if xy is not None:
+					events.append( ButtonEvent( xy[0], xy[1], value > 0, stamp ) )
+		return events
+
 		
 ########################################################################################
 ########################################################################################
@@ -529,11 +1251,11 @@ def main():
 	print("USER")
 	LP.LedCtrlString( 'USER   ', 0, 3, -1 )  # scroll  U S E R  from right to left
 	# try to give it some extra time:
-	time.wait( 5000 )
+	Wait( 5000 )
 
 	print("---\nTurning on all LEDs.")
 	LP.LedAllOn()
-	time.wait( 3000 )
+	Wait( 3000 )
 
 
 	# control of automap buttons and LEDs
@@ -541,10 +1263,10 @@ def main():
 	for n in range(3):
 		for i in range(0,8):
 			LP.LedCtrlAutomap( i, 3, 0 )
-			time.wait(50)
+			Wait(50)
 		for i in range(0,8):
 			LP.LedCtrlAutomap( i, 0, 3 )
-			time.wait(50)
+			Wait(50)
 	for i in range(0,8):
 		LP.LedCtrlAutomap( i, 0, 0 )
 
@@ -556,7 +1278,7 @@ def main():
 	print("and try again...")
 	while 1:
 		LP.LedCtrlRaw( random.randint(0,127), random.randint(0,3), random.randint(0,3) )
-		time.wait( 10 )
+		Wait( 10 )
 		but = LP.ButtonStateRaw()
 		if but != []:
 			print( but[0] )
@@ -590,7 +1312,7 @@ def main():
 	# query buttons via the "xy return strategy"
 	print("---\nPress some buttons. End by pushing ARM.")
 	while True:
-		time.wait( 10 )
+		Wait( 10 )
 		but = LP.ButtonStateXY()
 		if but != []:
 			LP.LedCtrlXY( but[0], but[1], 3, 0 )
@@ -0,0 +1,188 @@
+#!/usr/bin/python3
+
+#
+# asyncio front-end for launchpad.Launchpad (Python >= 3.6)
+#
+# Button presses come out of an async generator and LED writes are
+# coroutines, so game logic, animations and AI thinking can share one
+# event loop:
+#
+#   async with AsyncLaunchpad( LP ) as pad:
+#       async for event in pad.Events():
+#           await pad.LedCtrlXY( event.x, event.y, 3, 0 )
+#
+# LED writes go through a bounded queue that a single writer task empties
+# into the Launchpad. When the queue is full, the next write waits, so a
+# producer can never get further ahead of the device than <queueSize>
+# messages. With the Launchpad's own writer thread running
+# (LP.StartWriter()), the writer task also waits while that thread has
+# more than <queueSize> messages to send.
+#
+# Pygame's MIDI input cannot wake up an event loop, so Events() still
+# polls. It polls every <pollInterval> seconds (5 ms by default) while
+# buttons are being pressed. When nothing happens, the interval doubles
+# after every empty poll, up to <idlePollInterval> (20 ms), so an idle
+# pad costs less than the 30 ms pygame.time loop.
+#
+
+import asyncio
+
+import launchpad
+
+
+
+########################################################################################
+### CLASS AsyncLaunchpad
+###
+########################################################################################
+class AsyncLaunchpad:
+
+	def __init__( self, LP = None, queueSize = 64, pollInterval = 0.005, writeInterval = 0,
+	              idlePollInterval = 0.02 ):
+		self.LP               = LP or launchpad.Launchpad()
+		self.queueSize        = queueSize
+		self.pollInterval     = pollInterval      # seconds between input polls
+		self.idlePollInterval = idlePollInterval  # ... at most, once nothing happens
+		self.writeInterval    = writeInterval     # seconds to pause after each LED write
+		self.writes           = None              # see Queue()
+		self.writer           = None
+		self.closed           = False
+
+
+	#-------------------------------------------------------------------------------------
+	#-- the write queue; made on first use, so it belongs to the running event loop
+	#-------------------------------------------------------------------------------------
+	def Queue( self ):
+		if self.writes is None:
+			self.writes = asyncio.Queue( self.queueSize )
+		return self.writes
+
+
+	#-------------------------------------------------------------------------------------
+	#-- starts the writer task; Close() stops it again
+	#-------------------------------------------------------------------------------------
+	def Start( self ):
+		if self.writer is None:
+			self.closed = False
+			self.Queue()
+			self.writer = asyncio.ensure_future( self.WriteLoop() )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- sends the writes still queued, then stops the writer and Events()
+	#-------------------------------------------------------------------------------------
+	async def Close( self ):
+		self.closed = True
+		if self.writer is not None:
+			await self.Drain()
+			self.writer.cancel()
+			try:
+				await self.writer
+			except asyncio.CancelledError:
+				pass
+			self.writer = None
+
+
+	async def __aenter__( self ):
+		self.Start()
+		return self
+
+
+	async def __aexit__( self, *exc ):
+		await self.Close()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- yields every button change as a launchpad.ButtonEvent( x, y, pressed, time )
+	#-------------------------------------------------------------------------------------
+	async def Events( self ):
+		interval = self.pollInterval
+		while not self.closed:
+			events = self.LP.ButtonEventsXY()
+			if events:
+				interval = self.pollInterval
+			else:
+				await asyncio.sleep( interval )
+				interval = min( interval * 2, max( self.idlePollInterval, self.pollInterval ) )
+			for event in events:
+				yield event
+
+
+	#-------------------------------------------------------------------------------------
+	#-- queues a call to the Launchpad method <name>; waits while the queue is full
+	#-------------------------------------------------------------------------------------
+	async def Write( self, name, *args ):
+		await self.Queue().put( ( name, args ) )
+
+
+	async def LedCtrlXY( self, x, y, red, green ):
+		await self.Write( "LedCtrlXY", x, y, red, green )
+
+
+	async def LedCtrlRaw( self, number, red, green ):
+		await self.Write( "LedCtrlRaw", number, red, green )
+
+
+	async def LedCtrlRawRapid( self, allLeds ):
+		await self.Write( "LedCtrlRawRapid", list( allLeds ) )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- [ [ x, y, red, green ], ... ], shown at once (see Launchpad.LedCtrlFrame())
+	#-------------------------------------------------------------------------------------
+	async def LedCtrlFrame( self, leds ):
+		await self.Write( "LedCtrlFrame", list( leds ) )
+
+
+	async def Reset( self ):
+		await self.Write( "Reset" )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- waits until every queued write has been sent, by the writer thread too
+	#-------------------------------------------------------------------------------------
+	async def Drain( self ):
+		await self.Queue().join()
+		while self.LP.QueueDepth() > 0:
+			await asyncio.sleep( self.pollInterval )
+
+
+	async def WriteLoop( self ):
+		writes = self.Queue()
+		while True:
+			name, args = await writes.get()
+			try:
+				getattr( self.LP, name )( *args )
+			finally:
+				writes.task_done()
+			# the writer thread is too far behind: wait for it to catch up
+			while self.LP.QueueDepth() > self.queueSize:
+				await asyncio.sleep( self.pollInterval )
+			# let readers and other tasks in between messages
+			await asyncio.sleep( self.writeInterval )
+
+
+
+########################################################################################
+########################################################################################
+########################################################################################
+async def demo( pad ):
+	# lights up every pressed button until the lower right one is hit
+	async for event in pad.Events():
+		if ( event.x, event.y, event.pressed ) == ( 8, 8, True ):
+			break
+		await pad.LedCtrlXY( event.x, event.y, 3 if event.pressed else 0, 0 )
+
+
+async def main():
+	LP = launchpad.Launchpad()
+	LP.Open()
+	async with AsyncLaunchpad( LP ) as pad:
+		await pad.Reset()
+		await demo( pad )
+		await pad.Reset()
+	LP.Close()
+
+
+if __name__ == '__main__':
+	asyncio.new_event_loop().run_until_complete( main() )
@@ -0,0 +1,113 @@
+import unittest
+
+import launchpad
+
+try:
+    import asyncio
+    from launchpad_async import AsyncLaunchpad
+except (ImportError, SyntaxError):
+    asyncio = None
+
+
+class ScriptedLaunchpad:
+    # stands in for launchpad.Launchpad: hands out <batches> of button
+    # events, one batch per poll, and keeps the LED calls made to it
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.calls = []
+        self.polls = 0
+        self.depth = 0  # messages waiting in a pretend writer thread
+
+    def ButtonEventsXY(self):
+        self.polls += 1
+        return self.batches.pop(0) if self.batches else []
+
+    def QueueDepth(self):
+        return self.depth
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name,) + args)
+
+
+@unittest.skipIf(asyncio is None, "needs Python 3 asyncio")
+class AsyncLaunchpadTests(unittest.TestCase):
+    # driven step by step with run_until_complete, so this file still
+    # imports (and skips) under Python 2
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.run = self.loop.run_until_complete
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_events_and_writes(self):
+        LP = ScriptedLaunchpad([[], [launchpad.ButtonEvent(1, 2, True, 5),
+                                     launchpad.ButtonEvent(8, 8, True, 6)]])
+        pad = self.run(AsyncLaunchpad(LP, pollInterval=0).__aenter__())
+        events = pad.Events()
+        event = self.run(events.__anext__())
+        self.assertEqual(event, (1, 2, True, 5))
+        self.run(pad.LedCtrlXY(event.x, event.y, 3, 0))
+        self.assertEqual(self.run(events.__anext__()).x, 8)
+        self.run(pad.LedCtrlFrame([[0, 1, 0, 3]]))
+        self.run(pad.__aexit__(None, None, None))
+        self.assertEqual(LP.calls, [("LedCtrlXY", 1, 2, 3, 0),
+                                    ("LedCtrlFrame", [[0, 1, 0, 3]])])
+        self.assertRaises(StopAsyncIteration, self.run, events.__anext__())
+
+    def test_writes_wait_while_the_queue_is_full(self):
+        LP = ScriptedLaunchpad([])
+        pad = AsyncLaunchpad(LP, queueSize=2)
+        self.run(pad.LedCtrlRaw(0, 1, 1))
+        self.run(pad.LedCtrlRaw(1, 1, 1))
+        blocked = self.loop.create_task(pad.LedCtrlRaw(2, 1, 1))
+        self.run(asyncio.sleep(0.01))
+        self.assertFalse(blocked.done())
+        self.run(pad.__aenter__())
+        self.run(blocked)
+        self.run(pad.Close())
+        self.assertEqual([call[1] for call in LP.calls], [0, 1, 2])
+
+    def test_queue_is_made_in_the_running_loop(self):
+        pad = AsyncLaunchpad(ScriptedLaunchpad([]))
+        self.assertIsNone(pad.writes)
+        self.run(pad.__aenter__())
+        self.assertIsNotNone(pad.writes)
+        self.run(pad.Close())
+
+    def test_writes_wait_for_the_writer_thread(self):
+        LP = ScriptedLaunchpad([])
+        LP.depth = 3
+        pad = self.run(AsyncLaunchpad(LP, queueSize=2, pollInterval=0.001).__aenter__())
+        self.run(pad.LedCtrlRaw(0, 1, 1))
+        self.run(pad.LedCtrlRaw(1, 1, 1))
+        self.run(asyncio.sleep(0.01))
+        self.assertEqual([call[1] for call in LP.calls], [0])
+        drained = self.loop.create_task(pad.Drain())
+        LP.depth = 1
+        self.run(asyncio.sleep(0.01))
+        self.assertEqual([call[1] for call in LP.calls], [0, 1])
+        self.assertFalse(drained.done())
+        LP.depth = 0
+        self.run(drained)
+        self.run(pad.Close())
+
+    def test_idle_polls_back_off(self):
+        LP = ScriptedLaunchpad([])
+        pad = self.run(AsyncLaunchpad(LP, pollInterval=0.001,
+                                      idlePollInterval=0.016).__aenter__())
+        reader = self.loop.create_task(pad.Events().__anext__())
+        self.run(asyncio.sleep(0.2))
+        # 0.2 s of 1 ms polls would be about 200
+        self.assertLess(LP.polls, 30)
+        LP.batches.append([launchpad.ButtonEvent(0, 0, True, 1)])
+        self.assertEqual(self.run(reader).x, 0)
+        self.run(pad.Close())
+
+
+if __name__ == '__main__':
+        unittest.main(exit=False)
@@ -10,7 +10,6 @@
 
 import random
 import launchpad
-from pygame import time
 
 
 
@@ -30,7 +29,7 @@ def main():
 
 	while 1:
 		LP.LedCtrlRaw( random.randint(0,127), random.randint(0,3), random.randint(0,3) )
-		time.wait( 5 )
+		launchpad.Wait( 5 )
 		but = LP.ButtonStateRaw()
 		if but != []:
 			print( but )
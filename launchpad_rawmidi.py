@@ -0,0 +1,196 @@
+#!/usr/bin/python
+
+#
+# A MIDI backend for launchpad.py that talks to a raw MIDI device file,
+# e.g. an ALSA rawmidi node, without pygame:
+#
+#   LP = launchpad.Launchpad( RawMidi( "/dev/snd/midiC1D0" ) )
+#   LP.Open()
+#
+# Output bytes are collected and handed to the device with one write()
+# per flush; launchpad.Midi flushes after each message, frame, rapid
+# update or, with the writer thread running, whenever its queue runs
+# empty. Input is read without blocking and parsed back into pygame.midi
+# style events ( [ [ status, data1, data2, 0 ], time ] ).
+#
+# Anything that is a file descriptor works, so a pipe or a pty stands in
+# for the device in tests: RawMidi( inFd = r, outFd = w ).
+#
+
+import errno
+import os
+import timeit
+
+
+# data bytes that follow each kind of channel message (status >> 4)
+DATA_BYTES = { 0x8: 2, 0x9: 2, 0xA: 2, 0xB: 2, 0xC: 1, 0xD: 1, 0xE: 2 }
+
+
+
+########################################################################################
+### CLASS RawOutput / RawInput
+### What Output() and Input() return, like pygame.midi.Output / Input
+########################################################################################
+class RawOutput:
+
+	def __init__( self, fd, bufferSize, owned = False ):
+		self.fd         = fd
+		self.owned      = owned        # close the fd with the port
+		self.bufferSize = bufferSize   # flush by itself once this many bytes wait
+		self.pending    = bytearray()
+		self.writes     = 0            # write() calls made, for the curious
+
+
+	def write_short( self, status, data1 = 0, data2 = 0 ):
+		self.pending += bytearray( ( status, data1, data2 ) )
+		if len( self.pending ) >= self.bufferSize:
+			self.flush()
+
+
+	def write( self, msgTable ):
+		# running status is not used, so every message keeps its own status byte
+		for msg, stamp in msgTable:
+			self.pending += bytearray( msg )
+		if len( self.pending ) >= self.bufferSize:
+			self.flush()
+
+
+	def flush( self ):
+		while self.pending:
+			written = os.write( self.fd, bytes( self.pending ) )
+			self.writes += 1
+			del self.pending[ :written ]
+
+
+	def close( self ):
+		self.flush()
+		if self.owned:
+			os.close( self.fd )
+
+
+
+class RawInput:
+
+	def __init__( self, fd, clock, owned = False ):
+		self.fd      = fd
+		self.owned   = owned
+		self.clock   = clock
+		self.events  = []      # parsed, not read yet
+		self.status  = None    # running status
+		self.data    = []
+		self.needed  = 0
+		self.sysex   = False
+
+		try:
+			import fcntl
+			flags = fcntl.fcntl( fd, fcntl.F_GETFL )
+			fcntl.fcntl( fd, fcntl.F_SETFL, flags | os.O_NONBLOCK )
+		except ImportError:
+			pass
+
+
+	def Parse( self, data ):
+		stamp = self.clock()
+		for byte in bytearray( data ):
+			if byte >= 0xF8:            # real time messages can be anywhere; ignored
+				continue
+			if self.sysex and byte < 0x80:
+				continue
+			self.sysex = byte == 0xF0
+			if byte & 0x80:
+				# system messages end running status
+				self.status = byte if byte < 0xF0 else None
+				self.needed = DATA_BYTES.get( byte >> 4, 0 )
+				self.data   = []
+				continue
+			if self.status is None:
+				continue
+			self.data.append( byte )
+			if len( self.data ) == self.needed:
+				msg = [ self.status ] + self.data + [ 0 ] * ( 3 - self.needed )
+				self.events.append( [ msg, stamp ] )
+				self.data = []
+
+
+	def poll( self ):
+		while True:
+			try:
+				data = os.read( self.fd, 4096 )
+			except OSError as error:
+				if error.errno in ( errno.EAGAIN, errno.EWOULDBLOCK ):
+					break
+				raise
+			if not data:
+				break
+			self.Parse( data )
+		return len( self.events ) > 0
+
+
+	def read( self, count ):
+		self.poll()
+		events = self.events[ :count ]
+		del self.events[ :count ]
+		return events
+
+
+	def close( self ):
+		if self.owned:
+			os.close( self.fd )
+
+
+
+########################################################################################
+### CLASS RawMidi
+###
+########################################################################################
+class RawMidi:
+
+	#-------------------------------------------------------------------------------------
+	#-- <path>: the device file, opened once for each port;
+	#-- or <inFd> / <outFd>: file descriptors that are already open
+	#-- <bufferSize>: bytes collected at most before a write()
+	#-------------------------------------------------------------------------------------
+	def __init__( self, path = None, inFd = None, outFd = None, name = "Launchpad",
+	              bufferSize = 4096 ):
+		self.path       = path
+		self.inFd       = inFd
+		self.outFd      = outFd
+		self.name       = name
+		self.bufferSize = bufferSize
+		self.start      = timeit.default_timer()
+		self.users      = 0
+
+
+	def init( self ):
+		None
+
+
+	def get_count( self ):
+		return 1
+
+
+	def get_device_info( self, n ):
+		# ( interface, name, input, output, opened )
+		return ( b"rawmidi", self.name.encode( "ascii" ), 1, 1, int( self.users > 0 ) )
+
+
+	def time( self ):
+		return int( ( timeit.default_timer() - self.start ) * 1000 )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- the ports open the device file on their own (read only / write only), so
+	#-- reading can be non-blocking while writing is not
+	#-------------------------------------------------------------------------------------
+	def Output( self, midi_id, latency = 0, buffer_size = 0 ):
+		self.users += 1
+		if self.outFd is not None:
+			return RawOutput( self.outFd, self.bufferSize )
+		return RawOutput( os.open( self.path, os.O_WRONLY ), self.bufferSize, True )
+
+
+	def Input( self, midi_id, buffer_size = 0 ):
+		self.users += 1
+		if self.inFd is not None:
+			return RawInput( self.inFd, self.time )
+		return RawInput( os.open( self.path, os.O_RDONLY | os.O_NONBLOCK ), self.time, True )
@@ -0,0 +1,61 @@
+import os
+import unittest
+
+import launchpad
+from launchpad_rawmidi import RawMidi
+
+
+class RawMidiTests(unittest.TestCase):
+
+    def setUp(self):
+        # the launchpad writes into one pipe and reads from the other
+        self.toLP, self.fromTest = os.pipe()
+        self.toTest, self.fromLP = os.pipe()
+        self.LP = launchpad.Launchpad(RawMidi(inFd=self.toLP, outFd=self.fromLP))
+        self.assertTrue(self.LP.Open())
+
+    def tearDown(self):
+        for fd in (self.toLP, self.fromTest, self.toTest, self.fromLP):
+            os.close(fd)
+
+    def received(self):
+        return bytearray(os.read(self.toTest, 65536))
+
+    def test_sends_every_message_written(self):
+        self.LP.LedCtrlXY(2, 3, 3, 0)
+        self.assertEqual(self.received(), bytearray([144, 0x22, 3]))
+
+    def test_a_frame_is_one_write(self):
+        writes = self.LP.midi.devOut.writes
+        self.LP.LedCtrlFrame([[0, 1, 3, 0], [1, 1, 0, 3], [8, 8, 3, 3]])
+        self.assertEqual(self.LP.midi.devOut.writes, writes + 1)
+        self.assertEqual(self.received(),
+                         bytearray([176, 0, 32 + 16 + 4,
+                                    144, 0x00, 3, 144, 0x01, 48, 144, 0x78, 51,
+                                    176, 0, 32 + 4 + 1]))
+
+    def test_a_rapid_update_is_one_write(self):
+        writes = self.LP.midi.devOut.writes
+        self.LP.LedCtrlRawRapid(list(range(80)))
+        self.assertEqual(self.LP.midi.devOut.writes, writes + 1)
+        self.assertEqual(len(self.received()), 40 * 3)
+
+    def test_parses_button_events_with_running_status(self):
+        # a press, the release with running status, a clock tick in between,
+        # a sysex reply and an automap press
+        os.write(self.fromTest, bytearray([0x90, 0x25, 0x7F, 0xF8, 0x25, 0x00,
+                                           0xF0, 0x00, 0x20, 0x29, 0xF7,
+                                           0xB0, 0x6A, 0x7F]))
+        events = [event[:3] for event in self.LP.ButtonEventsXY()]
+        self.assertEqual(events, [(5, 3, True), (5, 3, False), (2, 0, True)])
+        self.assertEqual(self.LP.ButtonEventsXY(), [])
+
+    def test_messages_split_across_reads(self):
+        os.write(self.fromTest, bytearray([0x90, 0x25]))
+        self.assertEqual(self.LP.ButtonEventsXY(), [])
+        os.write(self.fromTest, bytearray([0x7F]))
+        self.assertEqual([event[:3] for event in self.LP.ButtonEventsXY()], [(5, 3, True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,398 @@
+import unittest
+
+import launchpad
+from launchpad_virtual import VirtualLaunchpad
+
+
+class RecordingMidi:
+    # stands in for launchpad.Midi, keeping the messages written to it
+    # and handing out <pending> input messages
+
+    def __init__(self, pending = None):
+        self.messages = []
+        self.pending = pending or []
+        self.reads = 0
+
+    def RawWrite(self, stat, dat1, dat2):
+        self.messages.append((stat, dat1, dat2))
+
+    def RawWriteSequence(self, messages):
+        self.messages.extend(tuple(msg) for msg in messages)
+
+    def SetPriority(self, priority):
+        return launchpad.PRIORITY_STATE
+
+    def BeginBatch(self):
+        pass
+
+    def EndBatch(self):
+        pass
+
+    def ReadCheck(self):
+        return len(self.pending) > 0
+
+    def ReadRaw(self):
+        return self.ReadRawMulti(1)
+
+    def ReadRawMulti(self, count = 16):
+        self.reads += 1
+        read, self.pending = self.pending[:count], self.pending[count:]
+        return read
+
+
+class LaunchpadBufferTests(unittest.TestCase):
+
+    def setUp(self):
+        self.LP = launchpad.Launchpad(VirtualLaunchpad())
+        self.LP.midi = RecordingMidi()
+
+    def test_buffer_control_byte(self):
+        self.LP.LedCtrlBuffer(1, 0, copy=True, flash=True)
+        self.assertEqual(self.LP.midi.messages, [(176, 0, 32 + 16 + 8 + 1)])
+
+    def test_frame_is_drawn_hidden_and_shown_in_one_message(self):
+        self.LP.LedCtrlFrame([[0, 1, 3, 0], [7, 0, 0, 3]])
+        self.assertEqual(self.LP.midi.messages,
+                         [(176, 0, 32 + 16 + 4),   # show 0, write 1, copy 0 into 1
+                          (144, 0, 3),
+                          (176, 111, 48),
+                          (176, 0, 32 + 4 + 1)])   # show and write 1
+        self.LP.midi.messages = []
+        self.LP.LedCtrlFrame([])
+        self.assertEqual(self.LP.midi.messages, [(176, 0, 32 + 16 + 1), (176, 0, 32)])
+
+    def test_swap_and_reset(self):
+        self.LP.LedCtrlBuffer(0, 1)
+        self.LP.LedBufferSwap()
+        self.assertEqual((self.LP.displayBuffer, self.LP.updateBuffer), (1, 0))
+        self.LP.Reset()
+        self.assertEqual((self.LP.displayBuffer, self.LP.updateBuffer), (0, 0))
+
+
+class LaunchpadInputTests(unittest.TestCase):
+
+    def setUp(self):
+        self.LP = launchpad.Launchpad(VirtualLaunchpad())
+
+    def test_drains_every_pending_event(self):
+        self.LP.midi = RecordingMidi([[[144, 0x25, 127, 0], 10],
+                                      [[176, 104, 127, 0], 11],
+                                      [[176, 0, 1, 0], 12],
+                                      [[144, 0x78, 0, 0], 13]])
+        events = self.LP.ButtonEventsXY()
+        self.assertEqual(events, [(5, 3, True, 10), (0, 0, True, 11), (8, 8, False, 13)])
+        self.assertEqual(events[0].pressed, True)
+        self.assertEqual(self.LP.midi.reads, 1)
+        self.assertEqual(self.LP.ButtonEventsXY(), [])
+
+    def test_reads_more_than_one_buffer_full(self):
+        self.LP.midi = RecordingMidi([[[144, 0, 127, 0], t] for t in range(40)])
+        self.assertEqual(len(self.LP.ButtonEventsXY()), 40)
+
+    def test_single_reads_still_work(self):
+        self.LP.midi = RecordingMidi([[[144, 0x78, 127, 0], 1], [[176, 111, 0, 0], 2]])
+        self.assertEqual(self.LP.ButtonStateXY(), [8, 8, True])
+        self.assertEqual(self.LP.ButtonStateXY(), [7, 0, False])
+        self.assertEqual(self.LP.ButtonStateXY(), [])
+        self.LP.midi = RecordingMidi([[[176, 111, 127, 0], 1]])
+        self.assertEqual(self.LP.ButtonStateRaw(), [207, True])
+
+
+class LaunchpadCharTests(unittest.TestCase):
+
+    def setUp(self):
+        self.LP = launchpad.Launchpad(VirtualLaunchpad())
+        self.LP.midi = RecordingMidi()
+
+    def grid(self, char, offsx):
+        # the slow way: which LEDs should be lit
+        lit = []
+        for y in range(8):
+            row = launchpad.CHARTAB[ord(char) * 8 + y]
+            for x in range(8):
+                j = x - offsx
+                lit.append(0 <= j < 8 and bool(row & 0x80 >> j))
+        return lit
+
+    def test_glyph_frames_match_the_charset(self):
+        for offsx in range(-8, 9):
+            frame = launchpad.GlyphFrame(ord("A"), offsx, 3)
+            self.assertEqual([led == 3 for led in frame], self.grid("A", offsx))
+        self.assertTrue(launchpad.GlyphFrame(ord("A"), 2, 3) is
+                        launchpad.GlyphFrame(ord("A"), 2, 3))
+
+    def test_first_char_is_sent_as_a_rapid_update(self):
+        self.LP.LedCtrlChar("A", 3, 0)
+        messages = self.LP.midi.messages
+        self.assertEqual(messages[0], (176, 0, 1))
+        self.assertEqual(len(messages), 33)
+        leds = [led for stat, a, b in messages[1:] for led in (a, b)]
+        self.assertEqual([led == 3 for led in leds], self.grid("A", 0))
+
+    def test_next_frames_only_send_what_changed(self):
+        self.LP.LedCtrlChar("A", 3, 0)
+        self.LP.midi.messages = []
+        self.LP.LedCtrlChar("A", 3, 0, 1)
+        before, after = self.grid("A", 0), self.grid("A", 1)
+        changed = [i for i in range(64) if before[i] != after[i]]
+        self.assertEqual(len(self.LP.midi.messages), len(changed))
+        for (stat, note, led), i in zip(self.LP.midi.messages, changed):
+            self.assertEqual(note, (i // 8) * 16 + i % 8)
+            self.assertEqual(led, 3 if after[i] else 0)
+
+        self.LP.midi.messages = []
+        self.LP.LedCtrlChar("A", 3, 0, 1)
+        self.assertEqual(self.LP.midi.messages, [])
+        self.LP.LedCtrlXY(0, 1, 3, 3)
+        self.LP.LedCtrlChar("A", 3, 0, 1)
+        self.assertEqual(len(self.LP.midi.messages), 1 + 33)
+
+
+class LaunchpadStringTests(unittest.TestCase):
+
+    def setUp(self):
+        self.LP = launchpad.Launchpad(VirtualLaunchpad())
+        self.LP.midi = RecordingMidi()
+        self.grids = []
+        draw = self.LP.LedCtrlGrid
+        def recordGrid(leds):
+            self.grids.append(tuple(leds))
+            draw(leds)
+        self.LP.LedCtrlGrid = recordGrid
+
+    def shown(self, text):
+        # the frames in which a whole character is on the grid
+        glyphs = [launchpad.GlyphFrame(ord(char), 0, 48) for char in text]
+        return [glyphs.index(grid) for grid in self.grids if grid in glyphs]
+
+    def test_scrolls_left_one_column_per_frame(self):
+        self.LP.LedCtrlString("AB", 0, 3, -1, fps=0)
+        self.assertEqual(len(self.grids), 8 + 16 + 1)
+        self.assertEqual(self.shown("AB"), [0, 1])
+        self.assertEqual(self.grids[-1], (0,) * 64)
+
+    def test_scrolls_right(self):
+        self.LP.LedCtrlString("AB", 0, 3, 1, fps=0)
+        self.assertEqual(len(self.grids), 25)
+        self.assertEqual(self.shown("AB"), [0, 1])
+
+    def test_sends_each_still_character_once(self):
+        self.LP.LedCtrlString("AA", 0, 3, 0, fps=0)
+        self.assertEqual(len(self.LP.midi.messages), 33)
+
+    def test_waits_between_frames(self):
+        waits = []
+        wait, launchpad.Wait = launchpad.Wait, waits.append
+        try:
+            self.LP.LedCtrlString("A", 0, 3, -1, fps=50)
+            self.LP.LedCtrlString("A", 0, 3, 0, fps=50)
+        finally:
+            launchpad.Wait = wait
+        self.assertEqual(waits, [20] * 17 + [80])
+
+
+class CountingLaunchpad(VirtualLaunchpad):
+    # two virtual Launchpads (ids 0/1 and 2/3) that count device lookups
+
+    def __init__(self):
+        VirtualLaunchpad.__init__(self)
+        self.lookups = 0
+        self.opened = []
+
+    def get_count(self):
+        return 4
+
+    def get_device_info(self, n):
+        self.lookups += 1
+        info = VirtualLaunchpad.get_device_info(self, n % 2)
+        return (info[0], b"Launchpad %d" % (n // 2 + 1)) + info[2:]
+
+    def Input(self, midi_id, buffer_size=4096):
+        self.opened.append(("in", midi_id))
+        return VirtualLaunchpad.Input(self, midi_id, buffer_size)
+
+    def Output(self, midi_id, latency=0, buffer_size=4096):
+        self.opened.append(("out", midi_id))
+        return VirtualLaunchpad.Output(self, midi_id, latency, buffer_size)
+
+
+class LaunchpadOpenTests(unittest.TestCase):
+
+    def setUp(self):
+        self.device = CountingLaunchpad()
+        self.LP = launchpad.Launchpad(self.device)
+
+    def test_open_looks_devices_up_once(self):
+        self.assertTrue(self.LP.Open())
+        self.assertEqual(self.device.lookups, 4)
+        self.assertEqual(self.device.opened, [("out", 1), ("in", 0)])
+
+    def test_close_releases_both_ports(self):
+        self.LP.Open()
+        self.LP.Close()
+        self.assertEqual((self.device.inputOpen, self.device.outputOpen), (False, False))
+        self.assertEqual((self.LP.midi.devIn, self.LP.midi.devOut), (None, None))
+
+    def test_reopen_skips_the_search(self):
+        self.LP.Open()
+        self.LP.Close()
+        self.assertTrue(self.LP.Open())
+        self.assertEqual(self.device.lookups, 4)
+        self.assertEqual(self.device.opened, [("out", 1), ("in", 0), ("out", 1), ("in", 0)])
+        self.LP.LedCtrlXY(0, 1, 3, 0)
+        self.assertEqual(self.device.Led(0, 1), 3)
+
+    def test_opens_the_second_launchpad(self):
+        self.assertTrue(self.LP.Open(1))
+        self.assertEqual(self.device.opened, [("out", 3), ("in", 2)])
+
+    def test_open_by_name(self):
+        self.assertTrue(self.LP.Open(name="Launchpad 2"))
+        self.assertEqual(self.device.opened, [("out", 3), ("in", 2)])
+
+    def test_failed_open_searches_again_next_time(self):
+        self.assertFalse(self.LP.Open(2))
+        self.assertFalse(self.LP.Open(2))
+        self.assertEqual(self.device.lookups, 8)
+
+
+class MidiWriterTests(unittest.TestCase):
+    # the thread is only started once everything is queued, so the
+    # queue contents are known when it runs
+
+    def setUp(self):
+        self.sent = []
+        self.writer = launchpad.MidiWriter(lambda *msg: self.sent.append(msg))
+
+    def send(self):
+        self.writer.start()
+        self.writer.Flush()
+        self.writer.Stop()
+        self.assertEqual(self.writer.Depth(), 0)
+
+    def test_only_the_latest_color_of_a_led_is_sent(self):
+        for velocity in range(4):
+            self.writer.Put([(144, 5, velocity)])
+        self.writer.Put([(176, 104, 3)])
+        self.writer.Put([(176, 104, 48)])
+        self.assertEqual(self.writer.Depth(), 2)
+        self.send()
+        self.assertEqual(self.sent, [(144, 5, 3), (176, 104, 48)])
+
+    def test_leds_are_not_merged_across_other_messages(self):
+        self.writer.Put([(144, 5, 1)])
+        self.writer.Put([(176, 0, 52)])
+        self.writer.Put([(144, 5, 2)])
+        self.writer.Put([(144, 5, 3)])
+        self.send()
+        self.assertEqual(self.sent, [(144, 5, 1), (176, 0, 52), (144, 5, 3)])
+
+    def test_game_state_goes_before_effects(self):
+        self.writer.Put([(144, 1, 1)], launchpad.PRIORITY_EFFECT)
+        self.writer.Put([(144, 2, 1)], launchpad.PRIORITY_EFFECT)
+        self.writer.Put([(144, 2, 3)])
+        self.writer.Put([(146, 0, 0), (146, 0, 0)])
+        self.send()
+        self.assertEqual(self.sent, [(144, 2, 3), (146, 0, 0), (146, 0, 0), (144, 1, 1)])
+
+    def test_reset_drops_pending_messages(self):
+        self.writer.Put([(144, 1, 1)], launchpad.PRIORITY_EFFECT)
+        self.writer.Put([(146, 0, 0)])
+        self.writer.Put([(176, 0, 0)])
+        self.writer.Put([(144, 1, 3)])
+        self.send()
+        self.assertEqual(self.sent, [(176, 0, 0), (144, 1, 3)])
+
+    def test_only_the_latest_rapid_frame_is_sent(self):
+        for velocity in (1, 2):
+            self.writer.Put([(176, 0, 1)], launchpad.PRIORITY_EFFECT)
+            self.writer.Put([(146, velocity, velocity)] * 32, launchpad.PRIORITY_EFFECT)
+            self.writer.Put([(144, 0x25, velocity)], launchpad.PRIORITY_EFFECT)
+        self.writer.Put([(144, 0x28, 3)], launchpad.PRIORITY_EFFECT)   # side column
+        self.assertEqual(self.writer.Depth(), 35)
+        self.send()
+        self.assertEqual(self.sent, [(176, 0, 1)] + [(146, 2, 2)] * 32
+                         + [(144, 0x25, 2), (144, 0x28, 3)])
+
+    def test_frames_are_not_merged_across_other_messages(self):
+        self.writer.Put([(176, 0, 1)])
+        self.writer.Put([(146, 1, 1)] * 32)
+        self.writer.Put([(176, 0, 52)])
+        self.writer.Put([(176, 0, 1)])
+        self.writer.Put([(146, 2, 2)] * 32)
+        self.send()
+        self.assertEqual(len(self.sent), 67)
+
+    def test_frames_of_another_size_are_kept(self):
+        self.writer.Put([(176, 0, 1)])
+        self.writer.Put([(146, 1, 1)] * 40)
+        self.writer.Put([(176, 0, 1)])
+        self.writer.Put([(146, 2, 2)] * 32)
+        self.send()
+        self.assertEqual(len(self.sent), 74)
+
+    def test_midi_queues_once_the_writer_runs(self):
+        midi = launchpad.Midi(VirtualLaunchpad())
+        midi.devOut = self
+        self.write_short = lambda *msg: self.sent.append(msg)
+        midi.StartWriter()
+        midi.RawWrite(144, 0, 3)
+        midi.StopWriter()
+        self.assertEqual(midi.QueueDepth(), 0)
+        self.assertEqual(self.sent, [(144, 0, 3)])
+
+    def test_raw_write_multi_goes_through_the_writer(self):
+        midi = launchpad.Midi(VirtualLaunchpad())
+        midi.devOut = self
+        self.write_short = lambda *msg: self.sent.append(msg)
+        self.write = lambda table: self.fail("bypassed the writer")
+        midi.StartWriter()
+        midi.RawWriteMulti([[[144, 0, 3], 0], [[176, 0], 0]])
+        midi.StopWriter()
+        self.assertEqual(self.sent, [(144, 0, 3), (176, 0, 0)])
+
+
+class MidiStatsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.device = VirtualLaunchpad(clock=lambda: self.now)
+        self.LP = launchpad.Launchpad(self.device)
+        self.LP.Open()
+        self.lines = []
+        self.stats = self.LP.EnableStats(logInterval=1, log=self.lines.append)
+
+    def test_counts_messages_per_launchpad_call(self):
+        self.LP.LedCtrlXY(0, 1, 3, 0)
+        self.LP.LedCtrlString("A", 3, 0, -1, fps=0)
+        self.LP.Reset()
+        out = self.stats.Snapshot()["out"]
+        self.assertEqual(out["LedCtrlXY"]["messages"], 1)
+        self.assertEqual(out["LedCtrlXY"]["bytes"], 3)
+        self.assertEqual(out["Reset"]["messages"], 1)
+        self.assertEqual(sorted(out), ["LedCtrlString", "LedCtrlXY", "Reset"])
+        self.assertEqual(sum(entry["messages"] for entry in out.values()),
+                         len(self.device.sent))
+
+    def test_press_to_led_latency(self):
+        self.now = 100
+        self.device.Press(2, 2)
+        self.LP.ButtonEventsXY()
+        self.now = 108
+        self.LP.LedCtrlXY(2, 2, 3, 0)
+        snapshot = self.stats.Snapshot()
+        self.assertEqual(snapshot["latencyMs"]["<=10"], 1)
+        self.assertEqual(sum(snapshot["latencyMs"].values()), 1)
+        self.assertEqual(snapshot["in"]["ButtonEventsXY"]["messages"], 1)
+
+    def test_logs_a_line_every_interval(self):
+        self.LP.LedCtrlXY(0, 1, 3, 0)
+        self.assertEqual(self.lines, [])
+        self.now = 1000
+        self.LP.LedCtrlXY(0, 1, 0, 3)
+        self.assertEqual(len(self.lines), 1)
+        self.assertTrue(self.lines[0].startswith("MIDI 1.0s out 2.0 msg/s"))
+
+
+if __name__ == '__main__':
+        unittest.main(exit=False)
@@ -0,0 +1,226 @@
+#!/usr/bin/python
+
+#
+# A Launchpad that only exists in memory, for running launchpad.py and the
+# game without hardware (tests, benchmarks, CI).
+#
+# VirtualLaunchpad has the same functions as pygame.midi, so it can be
+# handed to launchpad.Launchpad() in its place:
+#
+#   device = VirtualLaunchpad()
+#   LP = launchpad.Launchpad( device )
+#   LP.Open()
+#   device.Press( 3, 4 )                 # scripted button presses
+#   LP.LedCtrlXY( 3, 4, 3, 0 )
+#   device.Led( 3, 4 )                   # -> 3, the color code on display
+#   device.sent                          # -> every message, time stamped
+#
+# The LEDs are modelled the way the Launchpad programmer's reference
+# describes them: two buffers (display/update, copy, flash), the copy and
+# clear bits of each LED message, rapid updates and the automap row.
+# Coordinates are launchpad.py's X-Y ones: y = 0 is the automap row and
+# x = 8 the side column.
+#
+
+import timeit
+
+
+# the order rapid updates (status 146) fill the LEDs in
+RAPID_ORDER = [ ( x, y ) for y in range( 1, 9 ) for x in range( 0, 8 ) ] + \
+              [ ( 8, y ) for y in range( 1, 9 ) ] + \
+              [ ( x, 0 ) for x in range( 0, 8 ) ]
+
+
+
+########################################################################################
+### CLASS VirtualOutput / VirtualInput
+### What Output() and Input() return, like pygame.midi.Output / Input
+########################################################################################
+class VirtualOutput:
+
+	def __init__( self, device ):
+		self.device = device
+
+
+	def write_short( self, status, data1 = 0, data2 = 0 ):
+		self.device.Receive( status, data1, data2 )
+
+
+	def write( self, msgTable ):
+		for msg, stamp in msgTable:
+			msg = list( msg ) + [ 0, 0 ]
+			self.device.Receive( msg[0], msg[1], msg[2] )
+
+
+	def close( self ):
+		self.device.outputOpen = False
+
+
+
+class VirtualInput:
+
+	def __init__( self, device ):
+		self.device = device
+
+
+	def poll( self ):
+		return len( self.device.pending ) > 0
+
+
+	def read( self, count ):
+		events = self.device.pending[ :count ]
+		del self.device.pending[ :count ]
+		return events
+
+
+	def close( self ):
+		self.device.inputOpen = False
+
+
+
+########################################################################################
+### CLASS VirtualLaunchpad
+###
+########################################################################################
+class VirtualLaunchpad:
+
+	def __init__( self, name = "Launchpad", clock = None ):
+		self.name       = name
+		self.start      = timeit.default_timer()
+		self.clock      = clock          # optional function returning MIDI time (ms)
+		self.sent       = []             # ( time, status, data1, data2 ) of every message
+		self.pending    = []             # button events not read yet, pygame.midi style
+		self.inputOpen  = False
+		self.outputOpen = False
+		self.ResetLeds()
+
+
+	#-------------------------------------------------------------------------------------
+	#-- the pygame.midi functions launchpad.Midi uses
+	#-------------------------------------------------------------------------------------
+	def init( self ):
+		None
+
+
+	def get_count( self ):
+		return 2
+
+
+	def get_device_info( self, n ):
+		# ( interface, name, input, output, opened ): device 0 is the input, 1 the output
+		name = self.name.encode( "ascii" )
+		if n == 0:
+			return ( b"virtual", name, 1, 0, int( self.inputOpen ) )
+		return ( b"virtual", name, 0, 1, int( self.outputOpen ) )
+
+
+	def Input( self, midi_id, buffer_size = 4096 ):
+		self.inputOpen = True
+		return VirtualInput( self )
+
+
+	def Output( self, midi_id, latency = 0, buffer_size = 4096 ):
+		self.outputOpen = True
+		return VirtualOutput( self )
+
+
+	def time( self ):
+		if self.clock is not None:
+			return self.clock()
+		return int( ( timeit.default_timer() - self.start ) * 1000 )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- LED state
+	#-------------------------------------------------------------------------------------
+	def ResetLeds( self ):
+		self.buffers = [ dict( ( xy, 0 ) for xy in RAPID_ORDER ),
+		                 dict( ( xy, 0 ) for xy in RAPID_ORDER ) ]
+		self.display = 0
+		self.update  = 0
+		self.flash   = False
+		self.rapid   = 0
+
+
+	#-------------------------------------------------------------------------------------
+	#-- color code (red | green << 4) of LED <x/y> in the buffer on display
+	#-------------------------------------------------------------------------------------
+	def Led( self, x, y ):
+		return self.buffers[ self.display ][ ( x, y ) ]
+
+
+	#-------------------------------------------------------------------------------------
+	#-- all LEDs on display, { ( x, y ): color code }
+	#-------------------------------------------------------------------------------------
+	def Leds( self ):
+		return dict( self.buffers[ self.display ] )
+
+
+	def SetLed( self, xy, velocity ):
+		color = velocity & 0x33
+		if velocity & 4:        # copy: write both buffers
+			self.buffers[0][ xy ] = color
+			self.buffers[1][ xy ] = color
+		else:
+			self.buffers[ self.update ][ xy ] = color
+			if velocity & 8:    # clear the other buffer's copy
+				self.buffers[ 1 - self.update ][ xy ] = 0
+
+
+	#-------------------------------------------------------------------------------------
+	#-- a message from the computer
+	#-------------------------------------------------------------------------------------
+	def Receive( self, status, data1, data2 ):
+		self.sent.append( ( self.time(), status, data1, data2 ) )
+
+		if status == 146:
+			for velocity in ( data1, data2 ):
+				if self.rapid < len( RAPID_ORDER ):
+					self.SetLed( RAPID_ORDER[ self.rapid ], velocity )
+				self.rapid += 1
+			return
+
+		# anything else starts the next rapid update from the first LED again
+		self.rapid = 0
+
+		if status in ( 128, 144 ):
+			x, y = data1 & 0x0f, ( data1 >> 4 ) + 1
+			if x <= 8 and y <= 8:
+				self.SetLed( ( x, y ), data2 if status == 144 else 0 )
+
+		elif status == 176 and 104 <= data1 <= 111:
+			self.SetLed( ( data1 - 104, 0 ), data2 )
+
+		elif status == 176 and data1 == 0:
+			if data2 == 0:
+				self.ResetLeds()
+			elif data2 >= 125:
+				# all LEDs on, low/medium/full
+				level = data2 - 124
+				for xy in RAPID_ORDER:
+					self.buffers[ self.display ][ xy ] = level | level << 4
+			elif data2 & 32:
+				self.display = data2 & 1
+				self.update  = ( data2 >> 2 ) & 1
+				self.flash   = bool( data2 & 8 )
+				if data2 & 16:
+					self.buffers[ self.update ] = dict( self.buffers[ self.display ] )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- scripted input: a press (or release) of button <x/y>
+	#-------------------------------------------------------------------------------------
+	def Press( self, x, y, pressed = True, stamp = None ):
+		if y == 0:
+			msg = [ 176, 104 + x, 127 if pressed else 0, 0 ]
+		else:
+			msg = [ 144, ( ( y - 1 ) << 4 ) | x, 127 if pressed else 0, 0 ]
+		self.pending.append( [ msg, self.time() if stamp is None else stamp ] )
+
+
+	#-------------------------------------------------------------------------------------
+	#-- a press immediately followed by its release
+	#-------------------------------------------------------------------------------------
+	def Click( self, x, y ):
+		self.Press( x, y, True )
+		self.Press( x, y, False )
@@ -0,0 +1,60 @@
+import unittest
+
+import launchpad
+from launchpad_virtual import VirtualLaunchpad
+
+
+class VirtualLaunchpadTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.device = VirtualLaunchpad(clock=lambda: self.now)
+        self.LP = launchpad.Launchpad(self.device)
+        self.assertTrue(self.LP.Open())
+
+    def test_leds_and_automap_row(self):
+        self.LP.LedCtrlXY(2, 3, 3, 0)
+        self.LP.LedCtrlXY(8, 8, 0, 3)
+        self.LP.LedCtrlXY(4, 0, 1, 1)
+        self.assertEqual(self.device.Led(2, 3), 3)
+        self.assertEqual(self.device.Led(8, 8), 48)
+        self.assertEqual(self.device.Led(4, 0), 17)
+        self.LP.Reset()
+        self.assertEqual(set(self.device.Leds().values()), set([0]))
+
+    def test_records_every_message_with_its_time(self):
+        self.now = 12
+        self.LP.LedCtrlRaw(0, 3, 3)
+        self.assertEqual(self.device.sent, [(12, 144, 0, 51)])
+
+    def test_frames_stay_hidden_until_shown(self):
+        self.LP.LedCtrlXY(0, 1, 3, 0)
+        self.LP.LedFrameBegin()
+        self.LP.LedCtrlXY(1, 1, 0, 3)
+        self.assertEqual((self.device.Led(0, 1), self.device.Led(1, 1)), (3, 0))
+        self.LP.LedFrameShow()
+        self.assertEqual((self.device.Led(0, 1), self.device.Led(1, 1)), (3, 48))
+
+    def test_rapid_update_fills_grid_then_side_then_automap(self):
+        self.LP.LedCtrlRapidHome()
+        self.LP.LedCtrlRawRapid(list(range(1, 81)))
+        self.assertEqual(self.device.Led(0, 1), 1)
+        self.assertEqual(self.device.Led(7, 8), 64 & 0x33)
+        self.assertEqual(self.device.Led(8, 1), 65 & 0x33)
+        self.assertEqual(self.device.Led(7, 0), 80 & 0x33)
+
+    def test_scripted_presses(self):
+        self.device.Press(3, 4, stamp=7)
+        self.device.Click(2, 0)
+        events = self.LP.ButtonEventsXY()
+        self.assertEqual(events[0], (3, 4, True, 7))
+        self.assertEqual([event[:3] for event in events[1:]], [(2, 0, True), (2, 0, False)])
+
+    def test_scrolling_text_runs_headless(self):
+        self.LP.LedCtrlString("HI", 3, 0, -1, fps=0)
+        self.assertEqual(set(self.device.Leds().values()), set([0]))
+        self.assertTrue(len(self.device.sent) > 0)
+
+
+if __name__ == '__main__':
+        unittest.main(exit=False)
@@ -1,13 +1,30 @@
 #!/usr/bin/python
 
+import collections
+import contextlib
 import random
+import sys
+import timeit
 import launchpad
-from pygame import time
 
-class ButtonColor:
-    def __init__(self, r, g):
-        self.red = r
-        self.green = g
+class ButtonColor(object):
+    # The Launchpad can only show 4 red x 4 green levels, so every colour
+    # is a single shared instance: ButtonColor(3,0) always returns the same
+    # object, equality is identity and nothing is allocated per move.
+    # <code> is the colour byte the Launchpad expects (see LedGetColor).
+    __slots__ = ('red', 'green', 'code', 'hashCode')
+    palette = {}
+
+    def __new__(cls, r, g):
+        color = cls.palette.get((r, g))
+        if color is None:
+            color = object.__new__(cls)
+            color.red = r
+            color.green = g
+            color.code = max(min(int(r), 3), 0) | max(min(int(g), 3), 0) << 4
+            color.hashCode = hash((r, g))
+            cls.palette[(r, g)] = color
+        return color
 
     def nextColor(self):
         newr = self.red + 1
@@ -21,15 +38,78 @@ class ButtonColor:
         return ButtonColor(newr, newg)
 
     def __eq__(self, other):
-        return self.red == other.red and self.green == other.green
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
 
     def __str__(self):
         return "RED("+str(self.red)+"), GREEN("+str(self.green)+")"
 
     def __hash__(self):
-        return hash((self.red, self.green))
+        return self.hashCode
+
+    def __reduce__(self):
+        # unpickling goes through __new__, so it lands on the shared instance
+        return (ButtonColor, (self.red, self.green))
+
+OFF = ButtonColor(0,0)
+
+# the players' colours in seat order (red, green, yellow, orange)
+PLAYER_COLORS = [ButtonColor(3,0), ButtonColor(0,3), ButtonColor(1,2), ButtonColor(3,3)]
+
+def bitCount(mask):
+    return bin(mask).count("1")
+
+def bitIndexes(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+zobristTables = {}
+
+def zobristTable(maxx, maxy, players = 8):
+    # one random 64-bit key per (square, colour code), indexed by
+    # (x * maxy + y) * 64 + code, and one per side to move. The OFF keys
+    # are 0, so an empty board with nobody to move hashes to 0. The
+    # generator is seeded, so every process and run agrees on the keys.
+    key = (maxx, maxy, players)
+    if key not in zobristTables:
+        rng = random.Random(0x5113E)
+        squareKeys = [0 if i % 64 == OFF.code else rng.getrandbits(64)
+                      for i in range(maxx * maxy * 64)]
+        sideKeys = [rng.getrandbits(64) for i in range(players)]
+        zobristTables[key] = (squareKeys, sideKeys)
+    return zobristTables[key]
+
+class ZobristHashed:
+    # a position key kept up to date in O(1) per change; boards call
+    # updateZobrist from setColor, the game loop calls setSideToMove.
 
-class VirtualBoard:
+    def initZobrist(self):
+        self.zobristSquareKeys, self.zobristSideKeys = \
+            zobristTable(self.maxx, self.maxy)
+        self.zobristKey = 0
+        self.sideToMove = None
+
+    @property
+    def zobrist(self):
+        return self.zobristKey
+
+    def updateZobrist(self, x, y, oldColor, newColor):
+        square = (x * self.maxy + y) * 64
+        self.zobristKey ^= (self.zobristSquareKeys[square + oldColor.code]
+                            ^ self.zobristSquareKeys[square + newColor.code])
+
+    def setSideToMove(self, player):
+        if self.sideToMove is not None:
+            self.zobristKey ^= self.zobristSideKeys[self.sideToMove]
+        if player is not None:
+            self.zobristKey ^= self.zobristSideKeys[player]
+        self.sideToMove = player
+
+class VirtualBoard(ZobristHashed):
     # logically, the board is maxx x maxy, indexed from zero.
     # but the launchpad is indexed from 1 vertically because of
     # the extra horizontal row at the top.
@@ -37,159 +117,646 @@ class VirtualBoard:
     def __init__(self, maxx = 8, maxy = 8):
         self.maxx = maxx
         self.maxy = maxy
-        self.matrix = [[ButtonColor(0,0)
+        self.matrix = [[OFF
                         for i in range(self.maxx)]
                         for j in range(self.maxy)]
-        self.emptySquares = self.maxx * self.maxy
+        # where each colour is, and how many squares it has;
+        # both kept up to date by setColor
+        self.positions = {OFF: set((x, y)
+                                   for x in range(self.maxx)
+                                   for y in range(self.maxy))}
+        self.counts = {OFF: self.maxx * self.maxy}
+        self.initZobrist()
+
+    @property
+    def emptySquares(self):
+        return self.counts.get(OFF, 0)
 
-    def updateEmptySquareCount(self, x, y, buttonColor):
-        if (buttonColor != ButtonColor(0,0) and self.matrix[x][y] == ButtonColor(0,0)):
-            self.emptySquares -= 1
-        if (buttonColor == ButtonColor(0,0) and self.matrix[x][y] != ButtonColor(0,0)):
-            self.emptySquares += 1            
+    def updateColorIndex(self, x, y, buttonColor):
+        oldColor = self.matrix[x][y]
+        if oldColor == buttonColor:
+            return
+        self.positions[oldColor].discard((x, y))
+        self.counts[oldColor] -= 1
+        if self.counts[oldColor] == 0:
+            del self.positions[oldColor]
+            del self.counts[oldColor]
+        self.positions.setdefault(buttonColor, set()).add((x, y))
+        self.counts[buttonColor] = self.counts.get(buttonColor, 0) + 1
+        self.updateZobrist(x, y, oldColor, buttonColor)
     
     def setColor(self, x, y, buttonColor):
-        self.updateEmptySquareCount(x, y, buttonColor)
+        self.updateColorIndex(x, y, buttonColor)
         self.matrix[x][y] = buttonColor        
     
     def cycleColor(self, x, y):
         self.setColor(x, y, self.matrix[x][y].nextColor())
 
     def off(self, x, y):
-        self.setColor(x, y, ButtonColor(0,0))
+        self.setColor(x, y, OFF)
 
     def currentColor(self, x, y):
         return self.matrix[x][y]
 
+    def isEmpty(self, x, y):
+        return self.matrix[x][y] is OFF
+
+    def countColor(self, buttonColor):
+        return self.counts.get(buttonColor, 0)
+
     def squaresWithColor(self, buttonColor):
-        return [Square(x,y,buttonColor)
-                    for x in range(0, self.maxx)
-                    for y in range(0, self.maxy)
-                    if buttonColor == self.matrix[x][y]]
+        return [Square(x, y, buttonColor)
+                for x, y in self.positions.get(buttonColor, ())]
                         
     def colorsWithCounts(self):
-        colors = [self.matrix[x][y]
-            for x in range(0, self.maxx)
-            for y in range(0, self.maxy)]
-        return {color: colors.count(color) for color in colors}
+        return dict(self.counts)
+
+    def colorsThatHaveMaxCount(self):
+        maxCount = max(self.counts.values())
+        return [k for k,v in self.counts.items()
+                if v == maxCount]
+
+class BitBoard(ZobristHashed):
+    # same interface as VirtualBoard, but each colour on the board is
+    # stored as one integer bitmask (bit x * maxy + y, the same order
+    # VirtualBoard scans in), plus a mask of all occupied squares.
+    # colors[x * maxy + y] is the colour of each square, for lookups.
+    # BoardLogic and SlimeWarsStrategy use the masks for move generation.
+
+    def __init__(self, maxx = 8, maxy = 8):
+        self.maxx = maxx
+        self.maxy = maxy
+        self.full = (1 << (self.maxx * self.maxy)) - 1
+        self.occupied = 0
+        self.masks = {}
+        self.colors = [OFF] * (self.maxx * self.maxy)
+        self.adjacentMasks = [self.maskWithinSpaces(i, 1)
+                              for i in range(self.maxx * self.maxy)]
+        self.reachMasks = [self.maskWithinSpaces(i, 2)
+                           for i in range(self.maxx * self.maxy)]
+        self.jumpMasks = [reach & ~adjacent
+                          for reach, adjacent in zip(self.reachMasks, self.adjacentMasks)]
+        self.initZobrist()
+
+    def bit(self, x, y):
+        return 1 << (x * self.maxy + y)
+
+    def maskWithinSpaces(self, index, distance):
+        x, y = divmod(index, self.maxy)
+        mask = 0
+        for x1 in range(max(0, x - distance), min(self.maxx, x + distance + 1)):
+            for y1 in range(max(0, y - distance), min(self.maxy, y + distance + 1)):
+                if not(x1 == x and y1 == y):
+                    mask |= self.bit(x1, y1)
+        return mask
+
+    @property
+    def emptySquares(self):
+        return self.maxx * self.maxy - bitCount(self.occupied)
+
+    def emptyMask(self):
+        return self.full & ~self.occupied
+
+    def colorMask(self, buttonColor):
+        if buttonColor == OFF:
+            return self.emptyMask()
+        return self.masks.get(buttonColor, 0)
+
+    def setColor(self, x, y, buttonColor):
+        index = x * self.maxy + y
+        bit = 1 << index
+        oldColor = self.colors[index]
+        if oldColor is buttonColor:
+            return
+        if oldColor is not OFF:
+            self.masks[oldColor] &= ~bit
+        self.colors[index] = buttonColor
+        self.updateZobrist(x, y, oldColor, buttonColor)
+        if buttonColor == OFF:
+            self.occupied &= ~bit
+        else:
+            self.occupied |= bit
+            self.masks[buttonColor] = self.masks.get(buttonColor, 0) | bit
+
+    def cycleColor(self, x, y):
+        self.setColor(x, y, self.currentColor(x, y).nextColor())
+
+    def off(self, x, y):
+        self.setColor(x, y, OFF)
+
+    def isEmpty(self, x, y):
+        return self.colors[x * self.maxy + y] is OFF
+
+    def currentColor(self, x, y):
+        return self.colors[x * self.maxy + y]
+
+    def squaresWithColor(self, buttonColor):
+        return [Square(i // self.maxy, i % self.maxy, buttonColor)
+                for i in bitIndexes(self.colorMask(buttonColor))]
+
+    def countColor(self, buttonColor):
+        return bitCount(self.colorMask(buttonColor))
+
+    def hasAdjacentColor(self, x, y, buttonColor):
+        return (self.adjacentMasks[x * self.maxy + y]
+                & self.colorMask(buttonColor)) != 0
+
+    def hasColorWithinTwo(self, x, y, buttonColor):
+        return (self.reachMasks[x * self.maxy + y]
+                & self.colorMask(buttonColor)) != 0
+
+    def captureMask(self, x, y, buttonColor):
+        # the opponent squares a move into (x, y) takes over
+        return (self.adjacentMasks[x * self.maxy + y] & self.occupied
+                & ~self.colorMask(buttonColor))
+
+    def reachableEmptyMask(self, buttonColor):
+        reach = 0
+        for i in bitIndexes(self.colorMask(buttonColor)):
+            reach |= self.reachMasks[i]
+        return reach & self.emptyMask()
+
+    def colorsWithCounts(self):
+        counts = {color: bitCount(mask)
+                  for color, mask in self.masks.items() if mask}
+        if self.emptySquares:
+            counts[OFF] = self.emptySquares
+        return counts
 
     def colorsThatHaveMaxCount(self):
         colorCounts = self.colorsWithCounts()
-        return [k for k,v in colorCounts.iteritems()
-                if v == max(colorCounts.values())]        
+        maxCount = max(colorCounts.values())
+        return [k for k,v in colorCounts.items()
+                if v == maxCount]
+
+class LedRenderer:
+    # Keeps a shadow copy of what the Launchpad is showing and only sends
+    # the LEDs that differ from it. Coordinates are the Launchpad's own XY
+    # ones: y 0 is the automap row along the top, x 8 the side column.
+    #
+    # Inside "with renderer.frame():" changes are collected and sent
+    # together when the frame ends; more than <rapidThreshold> changed
+    # LEDs go out as one LedCtrlRawRapid sweep of all 80 (40 messages)
+    # instead of one message each. Either way they are drawn into the
+    # Launchpad's hidden buffer and shown at once, so a capture wave
+    # does not tear.
+
+    def __init__(self, LP, rapidThreshold = 40):
+        self.LP = LP
+        self.rapidThreshold = rapidThreshold
+        self.shown = {}
+        self.pending = {}
+        self.depth = 0
+
+    @staticmethod
+    def rapidOrder():
+        # the order LedCtrlRawRapid fills the LEDs in: the grid left to
+        # right, top to bottom, then the side column, then the automap row
+        return [(x, y) for y in range(1, 9) for x in range(0, 8)] + \
+               [(8, y) for y in range(1, 9)] + [(x, 0) for x in range(0, 8)]
+
+    def reset(self):
+        # after a reset every LED is off
+        self.LP.Reset()
+        self.shown = dict((xy, OFF.code) for xy in self.rapidOrder())
+        self.pending = {}
+
+    def setColor(self, x, y, buttonColor):
+        self.pending[(x, y)] = buttonColor
+        if self.depth == 0:
+            self.flush()
+
+    @contextlib.contextmanager
+    def frame(self):
+        self.depth += 1
+        try:
+            yield self
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                self.flush()
+
+    def flush(self):
+        changed = [(xy, color) for xy, color in self.pending.items()
+                   if self.shown.get(xy) != color.code]
+        self.pending = {}
+        if len(changed) > 1:
+            self.LP.LedFrameBegin()
+        if len(changed) > self.rapidThreshold:
+            for xy, color in changed:
+                self.shown[xy] = color.code
+            self.LP.LedCtrlRapidHome()
+            self.LP.LedCtrlRawRapid([self.shown.get(xy, OFF.code) for xy in self.rapidOrder()])
+        else:
+            for (x, y), color in changed:
+                self.shown[(x, y)] = color.code
+                self.LP.LedCtrlXY(x, y, color.red, color.green)
+        if len(changed) > 1:
+            self.LP.LedFrameShow()
+
+
+def milliseconds():
+    return int(timeit.default_timer() * 1000)
+
+
+class Timeline:
+    # LED effects that play alongside the main loop instead of blocking it.
+    # An effect is a generator: it changes some LEDs, then yields how many
+    # ms to wait before its next step, and tick() runs the steps that are
+    # due. Effects are keyed by what they animate; playing a new effect on
+    # a busy key cancels the old one, or waits for it with queue=True.
+    # Cancelling closes the generator, so its finally: block can leave
+    # the LEDs tidy.
+
+    def __init__(self, clock = milliseconds):
+        self.clock = clock
+        self.running = {}    # key -> [when the next step is due, effect]
+        self.queued = {}     # key -> effects waiting for the running one
+
+    def play(self, effect, key = None, queue = False):
+        if key is None:
+            key = object()
+        if queue and key in self.running:
+            self.queued.setdefault(key, []).append(effect)
+        else:
+            self.cancel(key)
+            self.start(key, effect, self.clock())
+        return key
+
+    def start(self, key, effect, now):
+        try:
+            self.running[key] = [now + next(effect), effect]
+        except StopIteration:
+            self.finished(key, now)
+
+    def finished(self, key, now):
+        # an effect that ends without a step was never running
+        self.running.pop(key, None)
+        waiting = self.queued.pop(key, [])
+        if waiting:
+            if len(waiting) > 1:
+                self.queued[key] = waiting[1:]
+            self.start(key, waiting[0], now)
+
+    def cancel(self, key):
+        self.queued.pop(key, None)
+        entry = self.running.pop(key, None)
+        if entry is not None:
+            entry[1].close()
+
+    def cancelAll(self):
+        for key in list(self.running):
+            self.cancel(key)
+
+    def isRunning(self, key):
+        return key in self.running
+
+    def tick(self, now = None):
+        # runs every step that is due; True while anything is still playing
+        if now is None:
+            now = self.clock()
+        for key, entry in list(self.running.items()):
+            if self.running.get(key) is not entry or entry[0] > now:
+                continue
+            try:
+                entry[0] = now + next(entry[1])
+            except StopIteration:
+                self.finished(key, now)
+        return len(self.running) > 0
+
 
 class HWBoard:
     
-    def __init__(self, virtualBoard, LP):
+    def __init__(self, virtualBoard, LP, renderer = None, timeline = None):
         self.virtualBoard = virtualBoard
         self.LP = LP
+        self.renderer = renderer or LedRenderer(LP)
+        self.timeline = timeline or Timeline()
 
     def setColor(self, x, y, buttonColor):
         #self.matrix[x][y] = buttonColor
         self.virtualBoard.setColor(x, y, buttonColor)
-        self.LP.LedCtrlXY(x, y + 1, buttonColor.red, buttonColor.green)
+        self.timeline.cancel(('square', x, y))
+        self.renderer.setColor(x, y + 1, buttonColor)
 
     def flashWithColor(self, x, y, offColor, finalColor):
+        # returns straight away; the timeline plays the flash
         self.virtualBoard.setColor(x, y, finalColor)
+        self.timeline.play(self.flashSteps(x, y + 1, offColor, finalColor), ('square', x, y))
+
+    def flashSteps(self, x, y, offColor, finalColor):
         ms = 100
-        for i in range(1,4):
-            time.wait(ms)
-            self.LP.LedCtrlXY(x, y + 1, finalColor.red, finalColor.green)
-            time.wait(ms)
-            self.LP.LedCtrlXY(x, y + 1, offColor.red, offColor.green)
-        time.wait(ms)
-        self.LP.LedCtrlXY(x, y + 1, finalColor.red, finalColor.green)
+        try:
+            for i in range(1,4):
+                yield ms
+                self.renderer.setColor(x, y, finalColor)
+                yield ms
+                self.renderer.setColor(x, y, offColor)
+            yield ms
+        finally:
+            self.renderer.setColor(x, y, finalColor)
 
         
     def __getattr__(self,name):
         return getattr(self.virtualBoard, name)
         
 class HWTopRow:
-    def __init__(self, LP):
+    def __init__(self, LP, renderer = None, timeline = None):
         self.LP = LP
+        self.renderer = renderer or LedRenderer(LP)
+        self.timeline = timeline or Timeline()
 
     def setAllToColor(self, buttonColor):
-        for x in range(0,8):
-            self.LP.LedCtrlXY(x, 0, buttonColor.red, buttonColor.green)
+        self.timeline.cancel('topRow')
+        self.fill(buttonColor)
+
+    def fill(self, buttonColor):
+        with self.renderer.frame():
+            for x in range(0,8):
+                self.renderer.setColor(x, 0, buttonColor)
 
     def flashAllWithColor(self, buttonColors):
-        for i in range(1,5):
-            for color in buttonColors:
-                time.wait(1000)
-                self.setAllToColor(ButtonColor(0,0))
-                time.wait(1000)
-                self.setAllToColor(color)            
+        # returns straight away; the timeline plays the flashing
+        self.timeline.play(self.flashAllSteps(buttonColors), 'topRow')
+
+    def flashAllSteps(self, buttonColors):
+        try:
+            for i in range(1,5):
+                for color in buttonColors:
+                    yield 1000
+                    self.fill(OFF)
+                    yield 1000
+                    self.fill(color)
+        finally:
+            self.fill(buttonColors[-1])
 
 class HWSideColumn:
-    def __init__(self, LP):
+    def __init__(self, LP, renderer = None):
         self.LP = LP
+        self.renderer = renderer or LedRenderer(LP)
 
     def setAllToColor(self, buttonColor):
-        for x in range(1,9):
-            self.LP.LedCtrlXY(8, x, buttonColor.red, buttonColor.green)
+        with self.renderer.frame():
+            for x in range(1,9):
+                self.renderer.setColor(8, x, buttonColor)
+
 
+neighbourhoodTables = {}
+
+def neighbourhoodTable(maxx, maxy, distance):
+    # table[x][y] is a tuple of the in-bounds (x, y) coordinates within
+    # <distance> of (x, y), excluding (x, y) itself. Tables are shared
+    # between all boards of the same size.
+    key = (maxx, maxy, distance)
+    if key not in neighbourhoodTables:
+        neighbourhoodTables[key] = [
+            [tuple((x1, y1)
+                   for x1 in range(max(0, x - distance), min(maxx, x + distance + 1))
+                   for y1 in range(max(0, y - distance), min(maxy, y + distance + 1))
+                   if not(x1 == x and y1 == y))
+             for y in range(maxy)]
+            for x in range(maxx)]
+    return neighbourhoodTables[key]
 
 class BoardLogic:
 
     def __init__(self, board):
         self.board = board
+        self.adjacentTable = neighbourhoodTable(board.maxx, board.maxy, 1)
+        self.withinTwoTable = neighbourhoodTable(board.maxx, board.maxy, 2)
+        self.jumpTable = [[tuple(xy for xy in self.withinTwoTable[x][y]
+                                 if xy not in self.adjacentTable[x][y])
+                           for y in range(board.maxy)]
+                          for x in range(board.maxx)]
+        # a BitBoard answers neighbourhood questions with its masks
+        self.bitBoard = board if isinstance(board, BitBoard) else None
 
     def inBounds(self, x, y):
         return (x >= 0 and y >= 0
             and x < self.board.maxx and y < self.board.maxy)
 
+    def coordsWithinSpaces(self, x, y, distance):
+        if distance == 1:
+            return self.adjacentTable[x][y]
+        if distance == 2:
+            return self.withinTwoTable[x][y]
+        return neighbourhoodTable(self.board.maxx, self.board.maxy, distance)[x][y]
+
+    def adjacentCoords(self, x, y):
+        return self.adjacentTable[x][y]
+
+    def jumpCoords(self, x, y):
+        # squares exactly two spaces away
+        return self.jumpTable[x][y]
+
     def squaresAdjacentTo(self, x, y):
         return self.squaresWithinSpaces(x,y,1)
 
     def squaresWithinSpaces(self, x, y, distance):
-        return [Square(x1, y1, self.board.currentColor(x1, y1))
-                for x1 in range(x - distance, x + distance + 1)
-                for y1 in range(y - distance, y + distance + 1)
-                if(not(x1 == x and y1 == y)
-                     and self.inBounds(x1, y1))]                    
+        currentColor = self.board.currentColor
+        return [Square(x1, y1, currentColor(x1, y1))
+                for x1, y1 in self.coordsWithinSpaces(x, y, distance)]
             
     def hasAdjacentColor(self, x, y, color):
-        return [square
-                for square in self.squaresAdjacentTo(x, y)
-                if square.color == color]
+        if self.bitBoard is not None:
+            return self.bitBoard.hasAdjacentColor(x, y, color)
+        return self.hasColorWithinDistance(x, y, color, 1)
 
     def hasColorWithinDistance(self, x, y, color, distance):
-        return [square
-                for square in self.squaresWithinSpaces(x, y, distance)
-                if square.color == color]
+        currentColor = self.board.currentColor
+        return [Square(x1, y1, color)
+                for x1, y1 in self.coordsWithinSpaces(x, y, distance)
+                if currentColor(x1, y1) == color]
 
     def squareIsColor(self, x, y, color):
         return self.board.currentColor(x,y) == color
 
-class Square:
-    
+class Square(object):
+    # created by the thousands per turn, so no per-instance __dict__
+    __slots__ = ('x', 'y', 'color')
+
     def __init__(self, x, y, color):
         self.x = x
         self.y = y
         self.color = color
 
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y and self.color == other.color
+        return self.x == other.x and self.y == other.y and self.color is other.color
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.color))
 
     def __str__(self):
         return "X,Y="+str(self.x)+","+str(self.y)+" "+str(self.color)
 
 
+class MobilityTracker:
+    # keeps, for each player colour, the set of empty squares that colour
+    # can reach with a clone or a jump. Mover reports every landed square,
+    # so asking whether a player can move is a set lookup.
+
+    def __init__(self, board, playerColorList):
+        self.board = board
+        self.playerColorList = playerColorList
+        self.reachTable = neighbourhoodTable(board.maxx, board.maxy, 2)
+        self.rebuild()
+
+    def rebuild(self):
+        # number of squares of each colour within two spaces of (x, y)
+        self.reachCounts = dict((color, {}) for color in self.playerColorList)
+        self.reachable = dict((color, set()) for color in self.playerColorList)
+        for color in self.reachCounts:
+            for square in self.board.squaresWithColor(color):
+                self.addReach(square.x, square.y, color)
+
+    def addReach(self, x, y, color):
+        counts = self.reachCounts[color]
+        reachable = self.reachable[color]
+        isEmpty = self.board.isEmpty
+        for xy in self.reachTable[x][y]:
+            counts[xy] = counts.get(xy, 0) + 1
+            if isEmpty(xy[0], xy[1]):
+                reachable.add(xy)
+
+    def removeReach(self, x, y, color):
+        counts = self.reachCounts[color]
+        reachable = self.reachable[color]
+        for xy in self.reachTable[x][y]:
+            counts[xy] -= 1
+            if counts[xy] == 0:
+                del counts[xy]
+                reachable.discard(xy)
+
+    def squareChanged(self, x, y, oldColor, newColor):
+        # called after the board already shows newColor at (x, y)
+        if oldColor == newColor:
+            return
+        if oldColor in self.reachCounts:
+            self.removeReach(x, y, oldColor)
+        if newColor in self.reachCounts:
+            self.addReach(x, y, newColor)
+        if oldColor == OFF:
+            for reachable in self.reachable.values():
+                reachable.discard((x, y))
+        elif newColor == OFF:
+            for color, counts in self.reachCounts.items():
+                if (x, y) in counts:
+                    self.reachable[color].add((x, y))
+
+    def reachableSquares(self, player):
+        return self.reachable[self.playerColorList[player]]
+
+    def hasMove(self, player):
+        return len(self.reachable[self.playerColorList[player]]) > 0
+
+
 class Mover:
-    def __init__(self, board):
+    def __init__(self, board, observers = None):
         self.board = board
+        self.observers = observers or []
         
     def apply(self, square):
+        if self.observers:
+            oldColor = self.board.currentColor(square.x, square.y)
         self.board.setColor(square.x, square.y, square.color)
+        for observer in self.observers:
+            observer.squareChanged(square.x, square.y, oldColor, square.color)
+
+    def play(self, player, squares):
+        move = BoardMove(self, player, squares)
+        move.redo()
+        return move
         
 
+class BoardMove:
+    # the squares one move changes, applied in place. Each redo records
+    # what the squares held before, so undo puts exactly that back;
+    # both cost one setColor per changed square.
+
+    def __init__(self, mover, player, squares):
+        self.mover = mover
+        self.player = player
+        self.squares = squares
+        self.previous = None
+
+    def redo(self):
+        currentColor = self.mover.board.currentColor
+        self.previous = [Square(square.x, square.y, currentColor(square.x, square.y))
+                         for square in self.squares]
+        [self.mover.apply(square) for square in self.squares]
+
+    def undo(self):
+        [self.mover.apply(square) for square in reversed(self.previous)]
+        self.previous = None
+
+
+class MoveHistory:
+    # played moves for takeback; a new move forgets anything undone
+
+    def __init__(self):
+        self.played = []
+        self.undone = []
+
+    def record(self, move):
+        self.played.append(move)
+        self.undone = []
+
+    def undo(self):
+        if not self.played:
+            return None
+        move = self.played.pop()
+        move.undo()
+        self.undone.append(move)
+        return move
+
+    def redo(self):
+        if not self.undone:
+            return None
+        move = self.undone.pop()
+        move.redo()
+        self.played.append(move)
+        return move
+
+
+class LegalMove(object):
+    # a move for one player: a clone into (x, y) when source is None,
+    # otherwise a jump from the source (x, y) two spaces away.
+    # captures holds the (x, y) of every opponent square it takes over.
+    __slots__ = ('x', 'y', 'source', 'captures')
+
+    def __init__(self, x, y, source, captures):
+        self.x = x
+        self.y = y
+        self.source = source
+        self.captures = captures
+
+    def isJump(self):
+        return self.source is not None
+
+    def __eq__(self, other):
+        return (self.x == other.x and self.y == other.y
+                and self.source == other.source and self.captures == other.captures)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __str__(self):
+        return "X,Y="+str(self.x)+","+str(self.y)+" FROM "+str(self.source)+\
+            " CAPTURES "+str(list(self.captures))
+
+
 class SlimeWarsStrategy:
-    emptyColor = ButtonColor(0,0)
+    emptyColor = OFF
     
-    def __init__(self, board, playerColorList):
+    def __init__(self, board, playerColorList, mobility = None):
         self.board = board
         self.playerColorList = playerColorList
         self.boardLogic = BoardLogic(board)
+        # optional MobilityTracker fed by the same Mover as this game
+        self.mobility = mobility
 
     def fillInitCorner(self, x, y, playerColor):
         moves = []
@@ -207,6 +774,8 @@ class SlimeWarsStrategy:
             moves += self.fillInitCorner(maxx, 0, self.playerColorList[1])
             moves += self.fillInitCorner(maxx, maxy, self.playerColorList[2])
             moves += self.fillInitCorner(0, maxy, self.playerColorList[3])
+        elif (len(self.playerColorList) == 2):
+            moves += self.fillInitCorner(maxx, maxy, self.playerColorList[1])
         return moves
 
     def distance(self, x1, y1, x2, y2):
@@ -225,21 +794,95 @@ class SlimeWarsStrategy:
         
 
     def hasAValidMove(self, player):
+        if self.mobility is not None:
+            return self.mobility.hasMove(player)
         playerColor = self.playerColorList[player]
+        if self.boardLogic.bitBoard is not None:
+            return self.board.reachableEmptyMask(playerColor) != 0
         for playerSquare in self.board.squaresWithColor(playerColor):
-            for emptySquare in self.board.squaresWithColor(self.emptyColor):
-                if (abs(emptySquare.x - playerSquare.x) < 3 and \
-                    abs(emptySquare.y - playerSquare.y) < 3):
-                    return True
+            if self.boardLogic.hasColorWithinDistance(playerSquare.x, playerSquare.y,
+                                                      self.emptyColor, 2):
+                return True
         return False
 
 
+    def captureCoords(self, requestedx, requestedy, playerColor):
+        if self.boardLogic.bitBoard is not None:
+            maxy = self.board.maxy
+            return tuple(divmod(i, maxy) for i in bitIndexes(
+                         self.board.captureMask(requestedx, requestedy, playerColor)))
+        currentColor = self.board.currentColor
+        return tuple((x, y)
+                     for x, y in
+                         self.boardLogic.adjacentCoords(requestedx, requestedy)
+                     if currentColor(x, y) is not self.emptyColor and\
+                         currentColor(x, y) is not playerColor)
+
     def captures(self, requestedx, requestedy, playerColor):
-        return [Square(square.x, square.y, playerColor)        
-                for square in
-                    self.boardLogic.squaresAdjacentTo(requestedx, requestedy)
-                if not(square.color.red == 0 and square.color.green == 0) and\
-                    square.color != playerColor]
+        return [Square(x, y, playerColor)
+                for x, y in self.captureCoords(requestedx, requestedy, playerColor)]
+
+    def legalMoves(self, player):
+        # every clone (one per target square, however many squares could
+        # clone into it) and then every jump, generated lazily so callers
+        # can stop at the first one they like.
+        if self.boardLogic.bitBoard is not None:
+            return self.legalMovesFromMasks(player)
+        return self.legalMovesFromTables(player)
+
+    def legalMovesFromMasks(self, player):
+        # legalMoves on a BitBoard: clones, then jumps, by source square
+        playerColor = self.playerColorList[player]
+        board = self.board
+        maxy = board.maxy
+        empty = board.emptyMask()
+        sources = list(bitIndexes(board.colorMask(playerColor)))
+        captures = {}
+        cloned = 0
+        for source in sources:
+            targets = board.adjacentMasks[source] & empty & ~cloned
+            cloned |= targets
+            for i in bitIndexes(targets):
+                x, y = divmod(i, maxy)
+                captures[i] = self.captureCoords(x, y, playerColor)
+                yield LegalMove(x, y, None, captures[i])
+        for source in sources:
+            sourcexy = divmod(source, maxy)
+            for i in bitIndexes(board.jumpMasks[source] & empty):
+                x, y = divmod(i, maxy)
+                if i not in captures:
+                    captures[i] = self.captureCoords(x, y, playerColor)
+                yield LegalMove(x, y, sourcexy, captures[i])
+
+    def legalMovesFromTables(self, player):
+        playerColor = self.playerColorList[player]
+        emptyColor = self.emptyColor
+        currentColor = self.board.currentColor
+        adjacentTable = self.boardLogic.adjacentTable
+        jumpTable = self.boardLogic.jumpTable
+        sources = [(square.x, square.y)
+                   for square in self.board.squaresWithColor(playerColor)]
+        captures = {}
+        for sx, sy in sources:
+            for xy in adjacentTable[sx][sy]:
+                if xy not in captures and currentColor(xy[0], xy[1]) is emptyColor:
+                    captures[xy] = self.captureCoords(xy[0], xy[1], playerColor)
+                    yield LegalMove(xy[0], xy[1], None, captures[xy])
+        for sx, sy in sources:
+            for xy in jumpTable[sx][sy]:
+                if currentColor(xy[0], xy[1]) is emptyColor:
+                    if xy not in captures:
+                        captures[xy] = self.captureCoords(xy[0], xy[1], playerColor)
+                    yield LegalMove(xy[0], xy[1], (sx, sy), captures[xy])
+
+    def boardUpdatesFor(self, player, legalMove):
+        # the same squares calculateBoardUpdates returns, without re-checking
+        playerColor = self.playerColorList[player]
+        result = [Square(legalMove.x, legalMove.y, playerColor)]
+        result += [Square(x, y, playerColor) for x, y in legalMove.captures]
+        if legalMove.source is not None:
+            result.append(Square(legalMove.source[0], legalMove.source[1], self.emptyColor))
+        return result
         
     def calculateBoardUpdates(self, player, requestedx, requestedy, preselectedxy=None):
         result = []
@@ -255,41 +898,105 @@ class SlimeWarsStrategy:
     def isComplete(self):
         return self.board.emptySquares == 0
 
-def main():
+    def nextPlayer(self, player):
+        # the next seat after <player> (possibly <player> again) that
+        # has a move, or None when nobody can move
+        playerCount = len(self.playerColorList)
+        for offset in range(1, playerCount + 1):
+            candidate = (player + offset) % playerCount
+            if self.hasAValidMove(candidate):
+                return candidate
+        return None
+
+def main(computerSeats = None, backend = None):
+    # <backend> replaces pygame.midi, e.g. launchpad_virtual.VirtualLaunchpad()
+    computerSeats = computerSeats or []
     print("starting...")
     
-    RED = ButtonColor(3,0)
-    GREEN = ButtonColor(0,3)
-    YELLOW = ButtonColor(1,2)
-    ORANGE = ButtonColor(3,3)
-    playerColor = [RED, GREEN, YELLOW, ORANGE]
-    playerCount = len(playerColor)
-    LP = launchpad.Launchpad()  # creates a Launchpad instance (first Launchpad found)
+    playerColor = PLAYER_COLORS
+    LP = launchpad.Launchpad(backend)  # creates a Launchpad instance (first Launchpad found)
     print("Opening Launchpad...")
      
     LP.Open()                   # start it
-    LP.Reset()
+    LP.StartWriter()            # LED updates never hold up the game loop
+    renderer = LedRenderer(LP)
+    renderer.reset()
+    timeline = Timeline()
     virtualBoard = VirtualBoard(maxx=6, maxy=6)
-    board = HWBoard(virtualBoard, LP);
-    topRow = HWTopRow(LP);
+    board = HWBoard(virtualBoard, LP, renderer, timeline);
+    topRow = HWTopRow(LP, renderer, timeline);
     
-    boardMover = Mover(board)
-    game =SlimeWarsStrategy(board, playerColor)                         
-    [boardMover.apply(move) for move in game.initBoardSetup()]
+    mobility = MobilityTracker(board, playerColor)
+    boardMover = Mover(board, [mobility])
+    game =SlimeWarsStrategy(board, playerColor, mobility)
+    with renderer.frame():
+        [boardMover.apply(move) for move in game.initBoardSetup()]
+
+    history = MoveHistory()
+
+    import mike_ai
+    computerPlayers = dict((seat, mike_ai.AlphaBetaPlayer(playerColor))
+                           for seat in computerSeats)
                      
     currentPlayer = 0
+    virtualBoard.setSideToMove(currentPlayer)
     topRow.setAllToColor(playerColor[currentPlayer])
     print("READY!")
 
     preselectedButton = None    
+    gameOver = False
+    events = collections.deque()
     while True:
-        time.wait(30)
-        buttonxy = LP.ButtonStateXY()
+        # wait only once everything that was pressed has been handled
+        if not events:
+            launchpad.Wait(30)
+            events.extend(LP.ButtonEventsXY())
+        elif currentPlayer in computerPlayers:
+            # keep reading while the computer plays, so it can be stopped
+            events.extend(LP.ButtonEventsXY())
+        # animations keep playing while buttons are read
+        if not timeline.tick() and gameOver:
+            break
+
+        if currentPlayer in computerPlayers and not gameOver:
+            if [ 8, 8, True ] in [list(event[:3]) for event in events]:
+                break
+            move = computerPlayers[currentPlayer].chooseMove(virtualBoard, currentPlayer)
+            moves = game.boardUpdatesFor(currentPlayer, move)
+            # presses made while the computer was thinking are not the
+            # next player's move; only a quit is kept
+            events.extend(LP.ButtonEventsXY())
+            events = collections.deque(event for event in events
+                                       if list(event[:3]) == [ 8, 8, True ])
+        else:
+            if not events:
+                continue
+            buttonxy = list(events.popleft()[:3])
 
-        if buttonxy != []:
             #print(buttonxy)
             if buttonxy == [ 8, 8, True ]: # Lower right btn
                 break
+
+            if gameOver:    # only waiting for the winner flash to end
+                continue
+
+            if buttonxy in ([ 8, 1, True ], [ 8, 2, True ]): # top right: takeback, redo
+                with renderer.frame():
+                    if buttonxy[1] == 1:
+                        # take back to the last move a person made
+                        move = history.undo()
+                        while move is not None and move.player in computerPlayers \
+                                and history.played:
+                            move = history.undo()
+                    else:
+                        move = history.redo()
+                    if move is not None:
+                        preselectedButton = None
+                        currentPlayer = move.player if buttonxy[1] == 1 \
+                            else game.nextPlayer(move.player)
+                        virtualBoard.setSideToMove(currentPlayer)
+                        topRow.setAllToColor(playerColor[currentPlayer])
+                continue
             
             if buttonxy[0] == 8 or buttonxy[1] == 0:   # ignore the side rows
                 continue
@@ -297,37 +1004,39 @@ def main():
             if buttonxy[0] >= board.maxx or buttonxy[1] > board.maxy:   # ignore the unused rows
                 continue
             
-            if buttonxy[2] == True: # True == push down
-                # set a start button (optional)
-                if board.currentColor(buttonxy[0], buttonxy[1] - 1) == playerColor[currentPlayer]:
-                    preselectedButton = (buttonxy[0], buttonxy[1] - 1)
-                    board.flashWithColor(buttonxy[0],
-                                         buttonxy[1] - 1,
-                                         ButtonColor(0,0),
-                                         playerColor[currentPlayer])
-                    continue
-
-                #print("using preselected "+str(preselectedButton))            
-                moves = game.calculateBoardUpdates(currentPlayer, buttonxy[0], buttonxy[1] - 1, preselectedButton) 
-                [boardMover.apply(move) for move in moves]
-                
-                if len(moves)> 0:
-                    preselectedButton = None
-                    lookForNextPlayer = not(game.isComplete())
-                    while lookForNextPlayer:
-                        currentPlayer = (currentPlayer + 1) % playerCount
-                        lookForNextPlayer = not(game.hasAValidMove(currentPlayer))
-                    
+            if buttonxy[2] != True: # True == push down
+                continue
+
+            # set a start button (optional)
+            if board.currentColor(buttonxy[0], buttonxy[1] - 1) == playerColor[currentPlayer]:
+                preselectedButton = (buttonxy[0], buttonxy[1] - 1)
+                board.flashWithColor(buttonxy[0],
+                                     buttonxy[1] - 1,
+                                     OFF,
+                                     playerColor[currentPlayer])
+                continue
+
+            #print("using preselected "+str(preselectedButton))            
+            moves = game.calculateBoardUpdates(currentPlayer, buttonxy[0], buttonxy[1] - 1, preselectedButton) 
+
+        if len(moves)> 0:
+            # the captures and the new turn colour go out together
+            with renderer.frame():
+                history.record(boardMover.play(currentPlayer, moves))
+                preselectedButton = None
+                nextPlayer = None
+                if not(game.isComplete()):
+                    nextPlayer = game.nextPlayer(currentPlayer)
+
+                if nextPlayer is not None:
+                    currentPlayer = nextPlayer
+                    virtualBoard.setSideToMove(currentPlayer)
                     topRow.setAllToColor(playerColor[currentPlayer]) 
-                
-                if game.isComplete():
-                    #todo: make this flash with the winner's color
-                    winnerColors = board.colorsThatHaveMaxCount()
-                    topRow.flashAllWithColor(winnerColors)
-                    break;
 
-    
-    
+            if nextPlayer is None:
+                winnerColors = board.colorsThatHaveMaxCount()
+                topRow.flashAllWithColor(winnerColors)
+                gameOver = True
 
     print("DONE")
 
@@ -337,4 +1046,5 @@ def main():
 #	LP.LedCtrlString( 'HELLO   ', 0, 3, -1 )  # scroll "HELLO" from right to left
 
 if __name__ == "__main__":
-        main()
+        # seats (0..3) to be played by the computer, e.g. "mike.py 1 3"
+        main([int(seat) for seat in sys.argv[1:]])
@@ -0,0 +1,484 @@
+#!/usr/bin/python
+
+#
+# Computer opponents for SlimeWars (see mike.py).
+#
+# AlphaBetaPlayer and MctsPlayer can take any seat: they search a private
+# BitBoard copy of the position, so the Launchpad is never touched while
+# they think.
+#
+
+import math
+import random
+import time
+
+from mike import OFF, BitBoard, LegalMove, Mover, SlimeWarsStrategy, Square, bitIndexes
+
+try:
+    from concurrent import futures
+except ImportError:
+    # Python 2 without the "futures" backport: playouts run in-process
+    futures = None
+
+INFINITY = float("inf")
+WIN = 10000
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchPosition:
+    # a private BitBoard copy of a game, with moves that can be taken back.
+    # Who can still move comes from the BitBoard masks, which is cheaper
+    # than keeping a MobilityTracker up to date on every move.
+
+    def __init__(self, board, playerColorList):
+        self.playerColorList = playerColorList
+        self.board = BitBoard(board.maxx, board.maxy)
+        for color in playerColorList:
+            for square in board.squaresWithColor(color):
+                self.board.setColor(square.x, square.y, color)
+        self.mover = Mover(self.board)
+        self.strategy = SlimeWarsStrategy(self.board, playerColorList)
+
+    def make(self, player, move):
+        return self.mover.play(player, self.strategy.boardUpdatesFor(player, move))
+
+    def unmake(self, boardMove):
+        boardMove.undo()
+
+    def nextPlayer(self, player):
+        # who moves after <player>, or None when the game is over
+        if self.strategy.isComplete():
+            return None
+        return self.strategy.nextPlayer(player)
+
+    def key(self, player):
+        self.board.setSideToMove(player)
+        return self.board.zobrist
+
+    def counts(self):
+        return [self.board.countColor(color) for color in self.playerColorList]
+
+    def snapshot(self):
+        # the board as one player index (or -1) per square, for playouts
+        # in other processes
+        cells = [-1] * (self.board.maxx * self.board.maxy)
+        for player, color in enumerate(self.playerColorList):
+            for square in self.board.squaresWithColor(color):
+                cells[square.x * self.board.maxy + square.y] = player
+        return (self.board.maxx, self.board.maxy, tuple(cells))
+
+
+class TranspositionTable:
+    # fixed number of slots, indexed by the low bits of the position key.
+    # A slot is overwritten when it is empty, was written by an earlier
+    # search, or holds a result that was searched no deeper than the new one.
+
+    def __init__(self, bits = 16):
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        self.slots = [None] * self.size
+        self.generation = 0
+
+    def newSearch(self):
+        self.generation += 1
+
+    def probe(self, key):
+        entry = self.slots[hash(key) & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        index = hash(key) & self.mask
+        entry = self.slots[index]
+        if (entry is None or entry[5] != self.generation
+                or entry[0] == key or depth >= entry[1]):
+            self.slots[index] = (key, depth, value, flag, move, self.generation)
+
+
+class AlphaBetaPlayer:
+    # Paranoid negamax: the player to choose a move is one side, every
+    # other seat is assumed to play against it. Two opponents moving in a
+    # row do not flip the sign. Iterative deepening stops at the deadline
+    # and returns the best move of the deepest finished iteration.
+
+    def __init__(self, playerColorList, timeBudget = 0.2, maxDepth = 20, tableBits = 16):
+        self.playerColorList = playerColorList
+        self.timeBudget = timeBudget
+        self.maxDepth = maxDepth
+        self.table = TranspositionTable(tableBits)
+        self.nodes = 0
+        self.depthReached = 0
+
+    def chooseMove(self, board, player):
+        self.deadline = time.time() + self.timeBudget
+        self.position = SearchPosition(board, self.playerColorList)
+        self.root = player
+        self.nodes = 0
+        self.depthReached = 0
+        self.table.newSearch()
+
+        moves = self.orderedMoves(player, None)
+        if not moves:
+            return None
+        bestMove = moves[0]
+        try:
+            for depth in range(1, self.maxDepth + 1):
+                bestMove = self.searchRoot(player, depth, moves, bestMove)
+                self.depthReached = depth
+        except SearchTimeout:
+            pass
+        return bestMove
+
+    def searchRoot(self, player, depth, moves, previousBest):
+        moves.sort(key=lambda move: move is not previousBest)
+        alpha = -INFINITY
+        bestMove = moves[0]
+        for move in moves:
+            value = self.valueAfter(player, move, depth, alpha, INFINITY)
+            if value > alpha:
+                alpha = value
+                bestMove = move
+        self.table.store(self.positionKey(player), depth, alpha, EXACT, moveKey(bestMove))
+        return bestMove
+
+    def valueAfter(self, player, move, depth, alpha, beta):
+        boardMove = self.position.make(player, move)
+        nextPlayer = self.position.nextPlayer(player)
+        if nextPlayer is None:
+            value = self.evaluate(player, True)
+        elif self.sameSide(player, nextPlayer):
+            value = self.search(nextPlayer, depth - 1, alpha, beta)
+        else:
+            value = -self.search(nextPlayer, depth - 1, -beta, -alpha)
+        self.position.unmake(boardMove)
+        return value
+
+    def search(self, player, depth, alpha, beta):
+        self.nodes += 1
+        if time.time() > self.deadline:
+            raise SearchTimeout()
+
+        if depth == 0:
+            return self.evaluate(player, False)
+
+        key = self.positionKey(player)
+        entry = self.table.probe(key)
+        hashMove = None
+        if entry is not None:
+            hashMove = entry[4]
+            if entry[1] >= depth:
+                value, flag = entry[2], entry[3]
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        originalAlpha = alpha
+        best = -INFINITY
+        bestMove = None
+        for move in self.orderedMoves(player, hashMove):
+            value = self.valueAfter(player, move, depth, alpha, beta)
+            if value > best:
+                best = value
+                bestMove = move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+
+        if best <= originalAlpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, best, flag, moveKey(bestMove))
+        return best
+
+    def orderedMoves(self, player, hashMove):
+        # hash move first, then the most captures, clones before jumps
+        moves = list(self.position.strategy.legalMoves(player))
+        moves.sort(key=lambda move: (moveKey(move) != hashMove,
+                                     -len(move.captures), move.isJump()))
+        return moves
+
+    def sameSide(self, player, other):
+        return (player == self.root) == (other == self.root)
+
+    def positionKey(self, player):
+        return self.position.key(player)
+
+    def evaluate(self, player, finished):
+        # material of the root player against all of the others
+        counts = self.position.counts()
+        rootCount = counts[self.root]
+        value = rootCount - (sum(counts) - rootCount)
+        if finished:
+            value += WIN if rootCount == max(counts) else -WIN
+        return value if self.sameSide(player, self.root) else -value
+
+
+def moveKey(move):
+    if move is None:
+        return None
+    return (move.x, move.y, move.source)
+
+
+def rewardsFor(counts):
+    # 1 point for the winner, shared out on a draw
+    best = max(counts)
+    winners = counts.count(best)
+    return [1.0 / winners if count == best else 0.0 for count in counts]
+
+
+def randomPlayoutMove(position, player, rng, samples = 4):
+    # the best of a few random reachable squares, scored like GreedyPolicy
+    # (most captures, clones before jumps): much cheaper than listing every
+    # legal move, and purely random playouts say too little about a move
+    # to beat even a greedy player
+    color = position.playerColorList[player]
+    board = position.board
+    reachable = list(bitIndexes(board.reachableEmptyMask(color)))
+    best = None
+    for i in range(samples):
+        x, y = divmod(rng.choice(reachable), board.maxy)
+        captures = position.strategy.captureCoords(x, y, color)
+        clone = board.hasAdjacentColor(x, y, color)
+        score = len(captures) * 2 + clone
+        if best is None or score > best[0]:
+            best = (score, x, y, captures, clone)
+    score, x, y, captures, clone = best
+    source = None
+    if not clone:
+        currentColor = board.currentColor
+        source = rng.choice([xy for xy in position.strategy.boardLogic.jumpCoords(x, y)
+                             if currentColor(xy[0], xy[1]) is color])
+    return LegalMove(x, y, source, captures)
+
+
+# one SearchPosition per process and board size. Each batch of playouts
+# moves it to its snapshot square by square instead of building a new one.
+playoutPositions = {}
+
+
+def playoutPosition(snapshot, playerColorList):
+    maxx, maxy, cells = snapshot
+    key = (maxx, maxy, tuple(playerColorList))
+    position = playoutPositions.get(key)
+    if position is None:
+        position = SearchPosition(BitBoard(maxx, maxy), playerColorList)
+        playoutPositions[key] = position
+    colors = position.board.colors
+    for index, owner in enumerate(cells):
+        color = playerColorList[owner] if owner >= 0 else OFF
+        if colors[index] is not color:
+            position.mover.apply(Square(index // maxy, index % maxy, color))
+    return position
+
+
+def randomPlayouts(snapshot, playerColorList, player, count, seed, depth = None):
+    # plays <count> random games from <snapshot> with <player>
+    # to move and returns the summed rewards. A playout stops after <depth>
+    # moves and rewards whoever has the most squares then. Module level,
+    # so it can be sent to a worker process.
+    maxx, maxy, cells = snapshot
+    position = playoutPosition(snapshot, playerColorList)
+    rng = random.Random(seed)
+    # jumps do not fill the board, so cap the length of a playout
+    maxMoves = 4 * maxx * maxy if depth is None else depth
+    totals = [0.0] * len(playerColorList)
+    for i in range(count):
+        played = []
+        mover = player
+        while mover is not None and len(played) < maxMoves:
+            played.append(position.make(mover, randomPlayoutMove(position, mover, rng)))
+            mover = position.nextPlayer(mover)
+        counts = position.counts()
+        if mover is None:
+            rewards = rewardsFor(counts)
+        else:
+            # cut short: each player's share of the squares
+            rewards = [float(count) / sum(counts) for count in counts]
+        for seat, reward in enumerate(rewards):
+            totals[seat] += reward
+        for boardMove in reversed(played):
+            position.unmake(boardMove)
+    return totals
+
+
+class MctsNode:
+
+    def __init__(self, parent, move, player, key):
+        self.parent = parent
+        self.move = move
+        # player to move here, None once the game is over
+        self.player = player
+        self.key = key
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.rewards = None
+
+    def bestChild(self, exploration):
+        logVisits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda child: child.rewards[self.player] / child.visits
+                   + exploration * math.sqrt(logVisits / child.visits))
+
+
+class MctsPlayer:
+    # UCT search. Each leaf is scored by a batch of random playouts; with
+    # workers > 0 the batches run in a ProcessPoolExecutor, one batch in
+    # flight per worker, spread over the tree with virtual losses. The
+    # tree is kept between turns and re-rooted at the position it is next
+    # asked about. Stops after <playouts> playouts or <timeBudget> seconds,
+    # whichever comes first.
+    # Playouts favour captures and stop after <playoutDepth> moves (None:
+    # at the end of the game), scored by each player's share of the
+    # squares; new nodes try capturing moves first. On 6x6 against
+    # GreedyPolicy that wins with 400 playouts a move, where purely random
+    # playouts to the end of the game lost every game.
+
+    def __init__(self, playerColorList, timeBudget = 1.0, playouts = None,
+                 workers = 0, playoutsPerTask = 8, exploration = 1.4, seed = None,
+                 playoutDepth = 12):
+        self.playerColorList = playerColorList
+        self.timeBudget = timeBudget
+        self.playouts = playouts
+        self.workers = workers
+        self.playoutsPerTask = playoutsPerTask
+        self.playoutDepth = playoutDepth
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.executor = None
+        self.root = None
+        self.playoutsDone = 0
+        self.playoutsPerSecond = 0.0
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def chooseMove(self, board, player):
+        start = time.time()
+        self.position = SearchPosition(board, self.playerColorList)
+        self.root = self.reusedRoot(self.position.key(player))
+        if self.root is None:
+            self.root = MctsNode(None, None, player, self.position.key(player))
+
+        self.playoutsDone = 0
+        if self.workers > 0 and futures is not None:
+            self.searchInParallel(start)
+        else:
+            while not self.outOfBudget(start):
+                self.backPropagate(*self.runTask(self.selectLeaf()))
+        elapsed = time.time() - start
+        self.playoutsPerSecond = self.playoutsDone / elapsed if elapsed > 0 else 0.0
+
+        if not self.root.children:
+            moves = list(self.position.strategy.legalMoves(player))
+            return moves[0] if moves else None
+        best = max(self.root.children, key=lambda child: child.visits)
+        self.root = best
+        best.parent = None
+        return best.move
+
+    def reusedRoot(self, key):
+        # look a few plies below the last move played for this position
+        frontier = [self.root] if self.root is not None else []
+        for depth in range(len(self.playerColorList) + 1):
+            for node in frontier:
+                if node.key == key:
+                    node.parent = None
+                    return node
+            frontier = [child for node in frontier for child in node.children]
+        return None
+
+    def outOfBudget(self, start):
+        if self.playouts is not None and self.playoutsDone >= self.playouts:
+            return True
+        return time.time() - start >= self.timeBudget
+
+    def selectLeaf(self):
+        # walks down the tree on the private board, adds one new node and
+        # leaves a virtual loss on the path. Returns (leaf, snapshot).
+        node = self.root
+        played = []
+        while node.player is not None:
+            if node.untried is None:
+                node.untried = list(self.position.strategy.legalMoves(node.player))
+                self.rng.shuffle(node.untried)
+                # captures are tried first (pop() takes from the end)
+                node.untried.sort(key=lambda move: len(move.captures) * 2 + (not move.isJump()))
+            if node.untried:
+                move = node.untried.pop()
+                played.append(self.position.make(node.player, move))
+                nextPlayer = self.position.nextPlayer(node.player)
+                child = MctsNode(node, move, nextPlayer, self.position.key(nextPlayer))
+                node.children.append(child)
+                node = child
+                break
+            node = node.bestChild(self.exploration)
+            played.append(self.position.make(node.parent.player, node.move))
+        leaf = node
+        snapshot = self.position.snapshot()
+        counts = self.position.counts()
+        for boardMove in reversed(played):
+            self.position.unmake(boardMove)
+        while node is not None:
+            node.visits += 1
+            if node.rewards is None:
+                node.rewards = [0.0] * len(self.playerColorList)
+            node = node.parent
+        return leaf, snapshot, counts
+
+    def runTask(self, task):
+        leaf, snapshot, counts = task
+        if leaf.player is None:
+            return leaf, 1, rewardsFor(counts)
+        return leaf, self.playoutsPerTask, randomPlayouts(
+            snapshot, self.playerColorList, leaf.player,
+            self.playoutsPerTask, self.rng.getrandbits(32), self.playoutDepth)
+
+    def searchInParallel(self, start):
+        if self.executor is None:
+            self.executor = futures.ProcessPoolExecutor(self.workers)
+        pending = {}
+        while pending or not self.outOfBudget(start):
+            while len(pending) < self.workers and not self.outOfBudget(start):
+                leaf, snapshot, counts = self.selectLeaf()
+                if leaf.player is None:
+                    self.backPropagate(leaf, 1, rewardsFor(counts))
+                    continue
+                future = self.executor.submit(
+                    randomPlayouts, snapshot, self.playerColorList, leaf.player,
+                    self.playoutsPerTask, self.rng.getrandbits(32), self.playoutDepth)
+                pending[future] = leaf
+            if not pending:
+                break
+            done, notDone = futures.wait(list(pending),
+                                         return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                self.backPropagate(pending.pop(future), self.playoutsPerTask,
+                                   future.result())
+
+    def backPropagate(self, leaf, playouts, rewards):
+        # the virtual loss left by selectLeaf already counted one visit
+        self.playoutsDone += playouts
+        node = leaf
+        while node is not None:
+            node.visits += playouts - 1
+            for player, reward in enumerate(rewards):
+                node.rewards[player] += reward
+            node = node.parent
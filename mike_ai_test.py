@@ -0,0 +1,129 @@
+import time
+import unittest
+
+from mike import *
+from mike_ai import *
+
+RED = ButtonColor(3,0)
+GREEN = ButtonColor(0,3)
+YELLOW = ButtonColor(1,2)
+ORANGE = ButtonColor(3,3)
+
+class TranspositionTableTests(unittest.TestCase):
+
+    def setUp(self):
+        self.table = TranspositionTable(bits=2)
+        self.table.newSearch()
+
+    def test_stores_and_probes(self):
+        self.table.store(("a",), 3, 10, EXACT, None)
+        self.assertEqual(self.table.probe(("a",))[2], 10)
+        self.assertEqual(self.table.probe(("b",)), None)
+
+    def test_keeps_deeper_entry_from_same_search(self):
+        # keys 0 and 4 share a slot in a 4-slot table
+        self.table.store(0, 5, 1, EXACT, None)
+        self.table.store(4, 2, 2, EXACT, None)
+        self.assertEqual(self.table.probe(0)[2], 1)
+        self.assertEqual(self.table.probe(4), None)
+
+    def test_replaces_entry_from_older_search(self):
+        self.table.store(0, 5, 1, EXACT, None)
+        self.table.newSearch()
+        self.table.store(4, 2, 2, EXACT, None)
+        self.assertEqual(self.table.probe(4)[2], 2)
+
+
+class AlphaBetaPlayerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.virtualBoard = VirtualBoard(maxx=6, maxy=6)
+        self.colorList = [RED, GREEN, YELLOW, ORANGE]
+        self.strategy = SlimeWarsStrategy(self.virtualBoard, self.colorList)
+        self.mover = Mover(self.virtualBoard)
+        [self.mover.apply(move) for move in self.strategy.initBoardSetup()]
+
+    def test_returns_a_legal_move_within_budget(self):
+        player = AlphaBetaPlayer(self.colorList, timeBudget=0.1)
+        start = time.time()
+        move = player.chooseMove(self.virtualBoard, 0)
+        self.assertTrue(time.time() - start < 0.5)
+        self.assertTrue(move in list(self.strategy.legalMoves(0)))
+        self.assertTrue(player.depthReached >= 1)
+
+    def test_does_not_change_the_board(self):
+        before = self.virtualBoard.colorsWithCounts()
+        AlphaBetaPlayer(self.colorList, timeBudget=0.05).chooseMove(self.virtualBoard, 1)
+        self.assertEqual(self.virtualBoard.colorsWithCounts(), before)
+
+    def test_takes_the_biggest_capture(self):
+        board = VirtualBoard(maxx=6, maxy=6)
+        board.setColor(0,0, RED)
+        board.setColor(2,1, GREEN)
+        board.setColor(2,2, GREEN)
+        board.setColor(1,3, GREEN)
+        board.setColor(5,5, GREEN)
+        player = AlphaBetaPlayer([RED, GREEN], timeBudget=1, maxDepth=1)
+        move = player.chooseMove(board, 0)
+        self.assertEqual((move.x, move.y), (1, 2))
+
+
+class MctsPlayerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.virtualBoard = VirtualBoard(maxx=6, maxy=6)
+        self.colorList = [RED, GREEN, YELLOW, ORANGE]
+        self.strategy = SlimeWarsStrategy(self.virtualBoard, self.colorList)
+        self.mover = Mover(self.virtualBoard)
+        [self.mover.apply(move) for move in self.strategy.initBoardSetup()]
+
+    def test_random_playouts_share_out_one_point_each(self):
+        position = SearchPosition(self.virtualBoard, self.colorList)
+        totals = randomPlayouts(position.snapshot(), self.colorList, 0, 5, 1)
+        self.assertAlmostEqual(sum(totals), 5.0)
+
+    def test_stops_after_playout_budget(self):
+        player = MctsPlayer(self.colorList, timeBudget=60, playouts=16,
+                            playoutsPerTask=4, seed=1)
+        move = player.chooseMove(self.virtualBoard, 0)
+        self.assertTrue(move in list(self.strategy.legalMoves(0)))
+        self.assertEqual(player.playoutsDone, 16)
+        self.assertTrue(player.playoutsPerSecond > 0)
+
+    def test_reuses_the_tree_for_the_next_turn(self):
+        player = MctsPlayer(self.colorList, timeBudget=60, playouts=60,
+                            playoutsPerTask=2, seed=1)
+        move = player.chooseMove(self.virtualBoard, 0)
+        [self.mover.apply(square) for square in self.strategy.boardUpdatesFor(0, move)]
+        key = SearchPosition(self.virtualBoard, self.colorList).key(1)
+        subtree = player.reusedRoot(key)
+        self.assertTrue(subtree is not None)
+        self.assertTrue(subtree.visits > 0)
+
+    def test_finds_a_winning_capture(self):
+        board = VirtualBoard(maxx=6, maxy=6)
+        for x, y in [(0, 0), (0, 1)]:
+            board.setColor(x, y, RED)
+        for x, y in [(2, 0), (2, 1), (2, 2), (1, 2), (5, 5)]:
+            board.setColor(x, y, GREEN)
+        for seed in range(3):
+            player = MctsPlayer([RED, GREEN], timeBudget=60, playouts=64,
+                                playoutsPerTask=4, seed=seed)
+            move = player.chooseMove(board, 0)
+            self.assertEqual((move.x, move.y, len(move.captures)), (1, 1, 4))
+
+    def test_runs_playouts_in_worker_processes(self):
+        if futures is None:
+            return
+        player = MctsPlayer(self.colorList, timeBudget=60, playouts=8,
+                            workers=2, playoutsPerTask=2, seed=1)
+        try:
+            move = player.chooseMove(self.virtualBoard, 0)
+        finally:
+            player.close()
+        self.assertTrue(move in list(self.strategy.legalMoves(0)))
+        self.assertTrue(player.playoutsDone >= 8)
+
+
+if __name__ == '__main__':
+        unittest.main(exit=False)
@@ -0,0 +1,276 @@
+#!/usr/bin/python
+
+#
+# Benchmarks for the game engine and the LED driver, without a Launchpad:
+#
+#   python mike_bench.py --output bench.json
+#   python mike_bench.py --output new.json --compare bench.json
+#
+# Every benchmark runs --repeat times and keeps its best time. Results are
+# written as JSON; with --compare, each one is set against the same
+# benchmark in an earlier file and the run fails (exit status 1) when
+# anything got more than --tolerance slower or now sends more MIDI
+# messages. LED benchmarks drive a launchpad_virtual.VirtualLaunchpad.
+# The mctsWorkers benchmarks show how MctsPlayer playouts scale with the
+# number of worker processes.
+#
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2: no allocation numbers
+    tracemalloc = None
+
+import launchpad
+from launchpad_virtual import VirtualLaunchpad
+from mike import ButtonColor, Square
+from mike_ai import MctsPlayer
+from mike_selfplay import PLAYER_COLORS, RandomPolicy, newGame, playGame
+
+
+def midGame(size, moves, seed):
+    # a 4 player board <moves> random moves in, as main would have it
+    board, game, mover = newGame(size, PLAYER_COLORS)
+    policy = RandomPolicy(PLAYER_COLORS, seed)
+    player = 0
+    for i in range(moves):
+        if player is None or game.isComplete():
+            break
+        move = policy.chooseMove(board, player)
+        [mover.apply(square) for square in game.boardUpdatesFor(player, move)]
+        player = game.nextPlayer(player)
+    return board, game
+
+
+def benchCalculateBoardUpdates(scale):
+    board, game = midGame(6, 12, 1)
+    calls = 0
+    for i in range(20 * scale):
+        for player in range(len(PLAYER_COLORS)):
+            for x in range(board.maxx):
+                for y in range(board.maxy):
+                    game.calculateBoardUpdates(player, x, y)
+                    calls += 1
+    return calls, {}
+
+
+def benchHasAValidMove(scale):
+    board, game = midGame(6, 12, 2)
+    calls = 0
+    for i in range(2000 * scale):
+        for player in range(len(PLAYER_COLORS)):
+            game.hasAValidMove(player)
+            calls += 1
+    return calls, {}
+
+
+def benchCaptures(scale):
+    board, game = midGame(6, 12, 3)
+    calls = 0
+    for i in range(50 * scale):
+        for color in PLAYER_COLORS:
+            for x in range(board.maxx):
+                for y in range(board.maxy):
+                    game.captures(x, y, color)
+                    calls += 1
+    return calls, {}
+
+
+def benchColorsThatHaveMaxCount(scale):
+    board, game = midGame(6, 12, 4)
+    for i in range(10000 * scale):
+        board.colorsThatHaveMaxCount()
+    return 10000 * scale, {}
+
+
+def benchColorsAndSquares(scale):
+    # boards' worth of Squares with looked up colours: colorObjects is how
+    # many distinct ButtonColor objects that took (shared instances: 16 at
+    # most), boardBytes how much memory one board of 64 Squares holds
+    tracing = tracemalloc is not None and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    colors = set()
+    boardBytes = 0
+    for i in range(500 * scale):
+        if tracing:
+            start = tracemalloc.get_traced_memory()[0]
+        board = [Square(x, y, ButtonColor(x % 4, y % 4)) for x in range(8) for y in range(8)]
+        if tracing:
+            boardBytes = max(boardBytes, tracemalloc.get_traced_memory()[0] - start)
+        colors.update(id(square.color) for square in board)
+    if tracing:
+        tracemalloc.stop()
+    extra = {"colorObjects": len(colors)}
+    if tracing:
+        extra["boardBytes"] = boardBytes
+    return 500 * scale * 64, extra
+
+
+def randomGames(size):
+    def bench(scale):
+        moves = 0
+        for seed in range(2 * scale):
+            moves += playGame(seed, size, 4, ["random"], seed, 10000)["moves"]
+        return moves, {}
+    return bench
+
+
+def mctsPlayouts(workers):
+    # root playouts of one MctsPlayer move; the worker processes are
+    # started before the clock runs, so only the search is timed
+    def bench(scale):
+        board, game = midGame(6, 8, 5)
+        player = MctsPlayer(PLAYER_COLORS, timeBudget=600, playouts=4,
+                            workers=workers, playoutsPerTask=4, seed=1)
+        try:
+            player.chooseMove(board, 0)
+            player.root = None
+            player.playouts = 64 * scale
+            player.chooseMove(board, 0)
+        finally:
+            player.close()
+        return player.playoutsDone, {"workers": workers,
+                                     "playoutsPerSecond": round(player.playoutsPerSecond, 3)}
+    return bench
+
+
+def virtualLaunchpad():
+    device = VirtualLaunchpad()
+    LP = launchpad.Launchpad(device)
+    LP.Open()
+    return device, LP
+
+
+def benchLedCtrlChar(scale):
+    device, LP = virtualLaunchpad()
+    frames = 0
+    for i in range(scale):
+        for char in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+            for offsx in range(-8, 9):
+                LP.LedCtrlChar(char, 3, 0, offsx)
+                frames += 1
+    return frames, {"messages": len(device.sent)}
+
+
+def benchLedCtrlString(scale):
+    device, LP = virtualLaunchpad()
+    for i in range(scale):
+        for direction in (-1, 0, 1):
+            LP.LedCtrlString("SLIME WARS ", 0, 3, direction, fps=0)
+    return 3 * scale, {"messages": len(device.sent)}
+
+
+# name -> function(scale) returning (operations done, extra numbers)
+BENCHMARKS = [
+    ("calculateBoardUpdates", benchCalculateBoardUpdates),
+    ("hasAValidMove", benchHasAValidMove),
+    ("captures", benchCaptures),
+    ("colorsThatHaveMaxCount", benchColorsThatHaveMaxCount),
+    ("colorsAndSquares", benchColorsAndSquares),
+    ("randomGames6x6", randomGames(6)),
+    ("randomGames8x8", randomGames(8)),
+    ("randomGames12x12", randomGames(12)),
+    ("mctsWorkers1", mctsPlayouts(1)),
+    ("mctsWorkers2", mctsPlayouts(2)),
+    ("mctsWorkers4", mctsPlayouts(4)),
+    ("ledCtrlChar", benchLedCtrlChar),
+    ("ledCtrlString", benchLedCtrlString),
+]
+
+
+def runBenchmark(function, scale, repeat):
+    best = None
+    for i in range(repeat):
+        random.seed(0)
+        start = time.time()
+        operations, extra = function(scale)
+        seconds = time.time() - start
+        if best is None or seconds < best:
+            best = seconds
+    result = {
+        "seconds": round(best, 6),
+        "operations": operations,
+        "operationsPerSecond": round(operations / max(best, 1e-9), 3),
+    }
+    result.update(extra)
+    return result
+
+
+def compare(results, baseline, tolerance):
+    # one line per benchmark found in both runs; returns the lines and
+    # the names of the ones that got worse
+    lines = []
+    worse = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        new, old = results[name], baseline[name]
+        speed = new["operationsPerSecond"] / max(old["operationsPerSecond"], 1e-9)
+        note = ""
+        if speed < 1.0 - tolerance:
+            note = "  SLOWER"
+            worse.append(name)
+        # baselines from before the message counts have none to compare with
+        if old.get("messages") is not None and new.get("messages", 0) > old["messages"]:
+            note += "  MORE MESSAGES (%d -> %d)" % (old["messages"], new["messages"])
+            worse.append(name)
+        lines.append("%-24s %10.1f/s -> %10.1f/s  x%.2f%s"
+                     % (name, old["operationsPerSecond"], new["operationsPerSecond"],
+                        speed, note))
+    return lines, worse
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="SlimeWars and Launchpad driver benchmarks")
+    parser.add_argument("--output", help="JSON results file (default: stdout)")
+    parser.add_argument("--compare", help="an earlier results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="how much slower counts as a regression (default 0.10)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=int, default=5,
+                        help="how much work each benchmark does")
+    parser.add_argument("--only", action="append",
+                        help="run just this benchmark (repeatable): %s"
+                        % ", ".join(name for name, function in BENCHMARKS))
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, function in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        results[name] = runBenchmark(function, args.scale, args.repeat)
+        sys.stderr.write("%-24s %10.1f/s\n" % (name, results[name]["operationsPerSecond"]))
+
+    report = {
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "benchmarks": results,
+    }
+    text = json.dumps(report, indent=1, sort_keys=True) + "\n"
+    if args.output:
+        with open(args.output, "w") as out:
+            out.write(text)
+    else:
+        sys.stdout.write(text)
+
+    if args.compare:
+        with open(args.compare) as previous:
+            baseline = json.load(previous)["benchmarks"]
+        lines, worse = compare(results, baseline, args.tolerance)
+        sys.stderr.write("\n".join(lines) + "\n")
+        if worse:
+            sys.stderr.write("regressions: %s\n" % ", ".join(sorted(set(worse))))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
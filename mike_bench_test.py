@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import unittest
+
+from mike_bench import *
+
+
+class BenchmarkTests(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_writes_results_and_compares_with_itself(self):
+        quick = ["--scale", "1", "--repeat", "1", "--only", "captures",
+                 "--only", "ledCtrlString"]
+        self.assertEqual(main(quick + ["--output", self.path]), 0)
+        with open(self.path) as results:
+            benchmarks = json.load(results)["benchmarks"]
+        self.assertEqual(sorted(benchmarks), ["captures", "ledCtrlString"])
+        self.assertTrue(benchmarks["ledCtrlString"]["messages"] > 0)
+        self.assertEqual(main(quick + ["--output", os.devnull, "--compare", self.path,
+                                       "--tolerance", "0.99"]), 0)
+
+    def test_flags_slower_runs_and_extra_messages(self):
+        old = {"a": {"operationsPerSecond": 100.0, "messages": 10},
+               "b": {"operationsPerSecond": 100.0}}
+        new = {"a": {"operationsPerSecond": 100.0, "messages": 11},
+               "b": {"operationsPerSecond": 50.0}}
+        lines, worse = compare(new, old, 0.1)
+        self.assertEqual(sorted(worse), ["a", "b"])
+        self.assertEqual(compare(old, old, 0.1)[1], [])
+
+    def test_baseline_without_message_counts(self):
+        old = {"a": {"operationsPerSecond": 100.0}}
+        new = {"a": {"operationsPerSecond": 100.0, "messages": 11}}
+        lines, worse = compare(new, old, 0.1)
+        self.assertEqual(worse, [])
+        self.assertEqual(len(lines), 1)
+        self.assertNotIn("MESSAGES", lines[0])
+
+    def test_every_benchmark_runs(self):
+        for name, function in BENCHMARKS:
+            if name.startswith("randomGames"):
+                continue
+            operations, extra = function(1)
+            self.assertTrue(operations > 0, name)
+
+
+if __name__ == '__main__':
+        unittest.main(exit=False)
@@ -0,0 +1,178 @@
+#!/usr/bin/python
+
+#
+# Plays SlimeWars games without a Launchpad, on a plain VirtualBoard, and
+# streams one JSON line per finished game:
+#
+#   python mike_selfplay.py --games 2000 --size 6 --workers 4
+#   python mike_selfplay.py --players 2 --policy greedy --policy random
+#   python mike_selfplay.py --policy mike_ai:AlphaBetaPlayer --policy random
+#
+# One --policy per seat (repeated round the table if there are fewer).
+# A policy is a built-in name or "module:factory"; the factory is called
+# with the player colour list and must return an object with
+# chooseMove(board, player), like the players in mike_ai.
+#
+
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+
+from mike import PLAYER_COLORS, MobilityTracker, Mover, SlimeWarsStrategy, VirtualBoard
+
+try:
+    from concurrent import futures
+except ImportError:
+    futures = None
+
+
+class RandomPolicy:
+
+    def __init__(self, playerColorList, seed = None):
+        self.playerColorList = playerColorList
+        self.rng = random.Random(seed)
+
+    def chooseMove(self, board, player):
+        moves = list(SlimeWarsStrategy(board, self.playerColorList).legalMoves(player))
+        return self.rng.choice(moves)
+
+
+class GreedyPolicy:
+    # the most captures, clones before jumps, ties broken at random
+
+    def __init__(self, playerColorList, seed = None):
+        self.playerColorList = playerColorList
+        self.rng = random.Random(seed)
+
+    def chooseMove(self, board, player):
+        moves = list(SlimeWarsStrategy(board, self.playerColorList).legalMoves(player))
+        self.rng.shuffle(moves)
+        return max(moves, key=lambda move: len(move.captures) * 2 + (not move.isJump()))
+
+
+def alphaBetaPolicy(playerColorList, seed = None):
+    import mike_ai
+    return mike_ai.AlphaBetaPlayer(playerColorList, timeBudget=0.05)
+
+
+def mctsPolicy(playerColorList, seed = None):
+    import mike_ai
+    return mike_ai.MctsPlayer(playerColorList, timeBudget=0.2, seed=seed)
+
+
+POLICIES = {
+    "random": RandomPolicy,
+    "greedy": GreedyPolicy,
+    "alphabeta": alphaBetaPolicy,
+    "mcts": mctsPolicy,
+}
+
+
+def makePolicy(name, playerColorList, seed):
+    if name in POLICIES:
+        return POLICIES[name](playerColorList, seed=seed)
+    moduleName, factoryName = name.split(":")
+    factory = getattr(importlib.import_module(moduleName), factoryName)
+    return factory(playerColorList)
+
+
+def newGame(size, playerColorList):
+    # a size x size board set up as main sets it up; returns the board,
+    # the game and the Mover to play it with
+    board = VirtualBoard(maxx=size, maxy=size)
+    mobility = MobilityTracker(board, playerColorList)
+    mover = Mover(board, [mobility])
+    game = SlimeWarsStrategy(board, playerColorList, mobility)
+    [mover.apply(square) for square in game.initBoardSetup()]
+    return board, game, mover
+
+
+def playGame(gameIndex, size, players, policyNames, seed, maxMoves):
+    playerColorList = PLAYER_COLORS[:players]
+    board, game, mover = newGame(size, playerColorList)
+    policies = [makePolicy(policyNames[seat % len(policyNames)], playerColorList,
+                           seed * players + seat)
+                for seat in range(players)]
+
+    moveTimes = []
+    player = 0
+    board.setSideToMove(player)
+    while player is not None and len(moveTimes) < maxMoves:
+        start = time.time()
+        move = policies[player].chooseMove(board, player)
+        moveTimes.append(round((time.time() - start) * 1000.0, 3))
+        [mover.apply(square) for square in game.boardUpdatesFor(player, move)]
+        player = None if game.isComplete() else game.nextPlayer(player)
+        board.setSideToMove(player)
+
+    for policy in policies:
+        if hasattr(policy, "close"):
+            policy.close()
+
+    counts = [board.countColor(color) for color in playerColorList]
+    return {
+        "game": gameIndex,
+        "seed": seed,
+        "size": size,
+        "policies": [policyNames[seat % len(policyNames)] for seat in range(players)],
+        "winners": [seat for seat, count in enumerate(counts) if count == max(counts)],
+        "finished": player is None,
+        "moves": len(moveTimes),
+        "counts": counts,
+        "moveTimesMs": moveTimes,
+    }
+
+
+def playGames(args):
+    # yields results as games finish, in whatever order that is
+    jobs = [(i, args.size, args.players, args.policy, args.seed + i, args.maxMoves)
+            for i in range(args.games)]
+    if args.workers > 0 and futures is not None:
+        with futures.ProcessPoolExecutor(args.workers) as executor:
+            pending = [executor.submit(playGame, *job) for job in jobs]
+            for future in futures.as_completed(pending):
+                yield future.result()
+    else:
+        for job in jobs:
+            yield playGame(*job)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Headless SlimeWars self-play")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--size", type=int, default=6)
+    parser.add_argument("--players", type=int, choices=[2, 4], default=4)
+    parser.add_argument("--policy", action="append",
+                        help="built-in (%s) or module:factory, once per seat"
+                        % ", ".join(sorted(POLICIES)))
+    parser.add_argument("--workers", type=int, default=0,
+                        help="worker processes (0 plays in this process)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-moves", dest="maxMoves", type=int, default=1000)
+    parser.add_argument("--output", help="JSON lines file (default: stdout)")
+    args = parser.parse_args(argv)
+    args.policy = args.policy or ["random"]
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    wins = [0.0] * args.players
+    start = time.time()
+    try:
+        for result in playGames(args):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            for seat in result["winners"]:
+                wins[seat] += 1.0 / len(result["winners"])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    sys.stderr.write("%d games in %.1fs, wins by seat: %s\n"
+                     % (args.games, time.time() - start,
+                        " ".join("%.1f" % w for w in wins)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import json
+import unittest
+
+from mike_selfplay import *
+
+class PlayGameTests(unittest.TestCase):
+
+    def test_random_game_runs_to_the_end(self):
+        result = playGame(0, 6, 4, ["random"], 1, 1000)
+        self.assertTrue(result["finished"])
+        self.assertEqual(sum(result["counts"]) <= 36, True)
+        self.assertEqual(len(result["moveTimesMs"]), result["moves"])
+        self.assertTrue(json.loads(json.dumps(result)) == result)
+
+    def test_two_player_games_start_in_opposite_corners(self):
+        board, game, mover = newGame(6, PLAYER_COLORS[:2])
+        squares = [set((square.x, square.y) for square in board.squaresWithColor(color))
+                   for color in PLAYER_COLORS]
+        self.assertEqual(squares, [set([(0, 0), (0, 1), (1, 0)]),
+                                   set([(5, 5), (5, 4), (4, 5)]), set(), set()])
+
+    def test_policies_are_given_per_seat(self):
+        result = playGame(0, 6, 2, ["greedy", "random"], 2, 1000)
+        self.assertEqual(result["policies"], ["greedy", "random"])
+        self.assertTrue(result["moves"] > 0)
+
+    def test_same_seed_same_game(self):
+        self.assertEqual(playGame(0, 6, 4, ["random"], 5, 1000)["counts"],
+                         playGame(0, 6, 4, ["random"], 5, 1000)["counts"])
+
+    def test_policy_can_be_loaded_by_name(self):
+        policy = makePolicy("mike_selfplay:GreedyPolicy", PLAYER_COLORS, 0)
+        self.assertTrue(isinstance(policy, GreedyPolicy))
+
+
+if __name__ == '__main__':
+        unittest.main(exit=False)
@@ -1,6 +1,9 @@
+import pickle
+import random
 import unittest
 
 from mike import *
+from launchpad_virtual import VirtualLaunchpad
 
 RED = ButtonColor(3,0)
 GREEN = ButtonColor(0,3)
@@ -15,6 +18,17 @@ class ButtonColorTests(unittest.TestCase):
     def test_inequality(self):
         self.assertNotEqual(ButtonColor(3,3), ButtonColor(3,2))
 
+    def test_colors_are_interned(self):
+        self.assertTrue(ButtonColor(1,2) is ButtonColor(1,2))
+        self.assertTrue(ButtonColor(3,3).nextColor() is ButtonColor(0,0))
+
+    def test_color_carries_launchpad_code(self):
+        self.assertEqual(ButtonColor(3,0).code, 0x03)
+        self.assertEqual(ButtonColor(1,2).code, 0x21)
+
+    def test_unpickled_color_is_the_shared_instance(self):
+        self.assertTrue(pickle.loads(pickle.dumps(YELLOW, 2)) is YELLOW)
+
 class SquareTests(unittest.TestCase):
     def setUp(self):
         self.color1= ButtonColor(3,3)
@@ -62,6 +76,116 @@ class VirtualBoardTests(unittest.TestCase):
         winners = self.virtualBoard.colorsThatHaveMaxCount()
         self.assertListEqual(winners, [self.color0,self.color1])
 
+    def test_squaresWithColorFollowsOverwrites(self):
+        self.virtualBoard.setColor(1,1, self.color1)
+        self.virtualBoard.setColor(2,2, self.color1)
+        self.virtualBoard.setColor(1,1, self.color2)
+        squares = self.virtualBoard.squaresWithColor(self.color1)
+        self.assertEqual(squares, [Square(2,2, self.color1)])
+        self.assertEqual(self.virtualBoard.countColor(self.color2), 1)
+        self.assertEqual(self.virtualBoard.emptySquares, 62)
+
+
+class ZobristTests(unittest.TestCase):
+    color1 = ButtonColor(1,1)
+    color2 = ButtonColor(2,1)
+
+    def test_emptyBoardHashesToZero(self):
+        self.assertEqual(VirtualBoard().zobrist, 0)
+
+    def test_samePositionSameKeyWhateverTheOrder(self):
+        first = VirtualBoard()
+        first.setColor(1,1, self.color1)
+        first.setColor(2,2, self.color2)
+        second = VirtualBoard()
+        second.setColor(2,2, self.color1)
+        second.setColor(2,2, self.color2)
+        second.setColor(1,1, self.color1)
+        self.assertEqual(first.zobrist, second.zobrist)
+        self.assertNotEqual(first.zobrist, 0)
+
+    def test_undoingAChangeRestoresTheKey(self):
+        board = VirtualBoard()
+        board.setColor(1,1, self.color1)
+        key = board.zobrist
+        board.setColor(1,1, self.color2)
+        board.setColor(1,1, self.color1)
+        self.assertEqual(board.zobrist, key)
+
+    def test_sideToMoveIsPartOfTheKey(self):
+        board = VirtualBoard()
+        board.setColor(1,1, self.color1)
+        board.setSideToMove(0)
+        key = board.zobrist
+        board.setSideToMove(1)
+        self.assertNotEqual(board.zobrist, key)
+        board.setSideToMove(0)
+        self.assertEqual(board.zobrist, key)
+
+    def test_bitBoardAgreesWithVirtualBoard(self):
+        virtualBoard = VirtualBoard()
+        bitBoard = BitBoard()
+        for board in [virtualBoard, bitBoard]:
+            board.setColor(3,4, self.color1)
+            board.setColor(0,7, self.color2)
+            board.setColor(3,4, self.color2)
+            board.setSideToMove(2)
+        self.assertEqual(bitBoard.zobrist, virtualBoard.zobrist)
+
+
+class BitBoardTests(unittest.TestCase):
+    color0 = ButtonColor(0,0)
+    color1 = ButtonColor(1,1)
+    color2 = ButtonColor(2,1)
+
+    def setUp(self):
+        self.bitBoard = BitBoard()
+
+    def test_setColorIsReadBack(self):
+        self.bitBoard.setColor(2,3, self.color1)
+        self.assertEqual(self.bitBoard.currentColor(2,3), self.color1)
+        self.assertEqual(self.bitBoard.currentColor(3,2), self.color0)
+
+    def test_overwritingAColorMovesTheSquare(self):
+        self.bitBoard.setColor(2,3, self.color1)
+        self.bitBoard.setColor(2,3, self.color2)
+        self.assertEqual(self.bitBoard.countColor(self.color1), 0)
+        self.assertEqual(self.bitBoard.countColor(self.color2), 1)
+
+    def test_emptySquaresIsKeptUpToDate(self):
+        self.bitBoard.setColor(1,1, self.color1)
+        self.bitBoard.setColor(2,2, self.color2)
+        self.bitBoard.off(1,1)
+        self.assertEqual(self.bitBoard.emptySquares, 63)
+
+    def test_squaresWithColorMatchesVirtualBoard(self):
+        virtualBoard = VirtualBoard()
+        for board in [virtualBoard, self.bitBoard]:
+            board.setColor(0,7, self.color1)
+            board.setColor(5,2, self.color1)
+            board.setColor(4,4, self.color2)
+        for color in [self.color0, self.color1]:
+            self.assertEqual(
+                sorted((square.x, square.y)
+                       for square in self.bitBoard.squaresWithColor(color)),
+                sorted((square.x, square.y)
+                       for square in virtualBoard.squaresWithColor(color)))
+
+    def test_colorsWithCountsReturnsTotals(self):
+        self.bitBoard.setColor(1,1, self.color1)
+        self.bitBoard.setColor(2,2, self.color2)
+        self.bitBoard.setColor(2,3, self.color2)
+        totals = self.bitBoard.colorsWithCounts()
+        self.assertEqual(totals[self.color1], 1)
+        self.assertEqual(totals[self.color2], 2)
+        self.assertEqual(totals[self.color0], 61)
+
+    def test_hasAdjacentColor(self):
+        self.bitBoard.setColor(3,3, self.color1)
+        self.assertTrue(self.bitBoard.hasAdjacentColor(3,2, self.color1))
+        self.assertFalse(self.bitBoard.hasAdjacentColor(3,3, self.color1))
+        self.assertFalse(self.bitBoard.hasAdjacentColor(3,1, self.color1))
+        self.assertTrue(self.bitBoard.hasColorWithinTwo(3,1, self.color1))
 
     
 class BoardLogicTests(unittest.TestCase):
@@ -86,6 +210,20 @@ class BoardLogicTests(unittest.TestCase):
         squares = self.boardLogic.squaresAdjacentTo(0,0)
         self.assertEqual(len(squares), 3)
 
+    def test_squares_within_two_of_corner(self):
+        squares = self.boardLogic.squaresWithinSpaces(0,0,2)
+        self.assertEqual(len(squares), 8)
+
+    def test_jump_coords_are_exactly_two_away(self):
+        coords = self.boardLogic.jumpCoords(3,3)
+        self.assertEqual(len(coords), 16)
+        self.assertTrue((1,5) in coords)
+        self.assertFalse((2,2) in coords)
+
+    def test_tables_are_shared_between_boards_of_one_size(self):
+        other = BoardLogic(VirtualBoard())
+        self.assertTrue(other.adjacentTable is self.boardLogic.adjacentTable)
+
     def test_finds_adjacent_color(self):
         # arrange
         color = ButtonColor(1,1)
@@ -104,6 +242,240 @@ class BoardLogicTests(unittest.TestCase):
         # assert
         self.assertFalse(hasColor)        
 
+class MobilityTrackerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.virtualBoard = VirtualBoard(maxx=6, maxy=6)
+        self.colorList = [RED, GREEN, YELLOW, ORANGE]
+        self.mobility = MobilityTracker(self.virtualBoard, self.colorList)
+        self.mover = Mover(self.virtualBoard, [self.mobility])
+        self.strategy = SlimeWarsStrategy(self.virtualBoard, self.colorList,
+                                          self.mobility)
+        self.slowStrategy = SlimeWarsStrategy(self.virtualBoard, self.colorList)
+        [self.mover.apply(move) for move in self.strategy.initBoardSetup()]
+
+    def reachableByScan(self, player):
+        color = self.colorList[player]
+        return set((empty.x, empty.y)
+                   for empty in self.virtualBoard.squaresWithColor(OFF)
+                   for square in self.virtualBoard.squaresWithColor(color)
+                   if self.strategy.distance(empty.x, empty.y, square.x, square.y) < 3)
+
+    def test_reachable_squares_after_setup(self):
+        for player in range(4):
+            self.assertEqual(self.mobility.reachableSquares(player),
+                             self.reachableByScan(player))
+
+    def test_tracks_a_random_game(self):
+        rng = random.Random(7)
+        player = 0
+        while not self.strategy.isComplete():
+            if not self.strategy.hasAValidMove(player):
+                player = (player + 1) % 4
+                continue
+            target = rng.choice(sorted(self.mobility.reachableSquares(player)))
+            sources = [square for square in
+                       self.virtualBoard.squaresWithColor(self.colorList[player])
+                       if self.strategy.distance(target[0], target[1], square.x, square.y) < 3]
+            source = rng.choice(sources)
+            moves = self.strategy.calculateBoardUpdates(player, target[0], target[1],
+                                                        (source.x, source.y))
+            [self.mover.apply(move) for move in moves]
+            for other in range(4):
+                self.assertEqual(self.mobility.reachableSquares(other),
+                                 self.reachableByScan(other))
+                self.assertEqual(self.strategy.hasAValidMove(other),
+                                 self.slowStrategy.hasAValidMove(other))
+            player = (player + 1) % 4
+
+
+class BoardMoveTests(unittest.TestCase):
+
+    def setUp(self):
+        self.virtualBoard = VirtualBoard(maxx=6, maxy=6)
+        self.colorList = [RED, GREEN, YELLOW, ORANGE]
+        self.mobility = MobilityTracker(self.virtualBoard, self.colorList)
+        self.mover = Mover(self.virtualBoard, [self.mobility])
+        self.strategy = SlimeWarsStrategy(self.virtualBoard, self.colorList, self.mobility)
+        [self.mover.apply(move) for move in self.strategy.initBoardSetup()]
+        self.virtualBoard.setColor(2,0, GREEN)
+        self.mobility.rebuild()
+
+    def snapshot(self):
+        return (self.virtualBoard.zobrist,
+                sorted(self.mobility.reachableSquares(0)),
+                sorted(self.mobility.reachableSquares(1)))
+
+    def test_undo_restores_captures_and_jump_source(self):
+        before = self.snapshot()
+        updates = self.strategy.calculateBoardUpdates(0, 2, 1, (0, 0))
+        move = self.mover.play(0, updates)
+        self.assertEqual(self.virtualBoard.currentColor(2,0), RED)
+        self.assertEqual(self.virtualBoard.currentColor(0,0), OFF)
+        move.undo()
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(self.virtualBoard.currentColor(2,0), GREEN)
+
+    def test_redo_replays_the_move(self):
+        move = self.mover.play(0, self.strategy.calculateBoardUpdates(0, 2, 1, (0, 0)))
+        after = self.snapshot()
+        move.undo()
+        move.redo()
+        self.assertEqual(self.snapshot(), after)
+
+    def test_history_takes_back_in_order_and_forgets_redo_on_new_move(self):
+        history = MoveHistory()
+        before = self.snapshot()
+        history.record(self.mover.play(0, self.strategy.calculateBoardUpdates(0, 1, 1)))
+        history.record(self.mover.play(1, self.strategy.calculateBoardUpdates(1, 3, 0, (5, 0))))
+        self.assertEqual(history.undo().player, 1)
+        self.assertEqual(history.undo().player, 0)
+        self.assertEqual(history.undo(), None)
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(history.redo().player, 0)
+        history.record(self.mover.play(1, self.strategy.calculateBoardUpdates(1, 4, 1)))
+        self.assertEqual(history.redo(), None)
+
+
+class RecordingLaunchpad:
+    # stands in for launchpad.Launchpad, keeping the calls made to it
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name,) + args)
+
+
+class LedRendererTests(unittest.TestCase):
+
+    def setUp(self):
+        self.LP = RecordingLaunchpad()
+        self.renderer = LedRenderer(self.LP)
+        self.renderer.reset()
+        self.LP.calls = []
+
+    def test_only_sends_leds_that_change(self):
+        topRow = HWTopRow(self.LP, self.renderer)
+        topRow.setAllToColor(RED)
+        self.assertEqual(len(self.LP.calls), 10)
+        topRow.setAllToColor(RED)
+        self.assertEqual(len(self.LP.calls), 10)
+        self.renderer.setColor(0, 0, OFF)
+        self.assertEqual(self.LP.calls[-1], ("LedCtrlXY", 0, 0, 0, 0))
+
+    def test_frame_sends_the_last_color_once(self):
+        board = HWBoard(VirtualBoard(maxx=6, maxy=6), self.LP, self.renderer)
+        with self.renderer.frame():
+            board.setColor(2, 3, RED)
+            board.setColor(2, 3, GREEN)
+            board.setColor(4, 4, OFF)
+            self.assertEqual(self.LP.calls, [])
+        self.assertEqual(self.LP.calls, [("LedCtrlXY", 2, 4, 0, 3)])
+        self.assertEqual(board.currentColor(2, 3), GREEN)
+
+    def test_uses_rapid_update_for_big_changes(self):
+        side = HWSideColumn(self.LP, self.renderer)
+        side.setAllToColor(YELLOW)
+        self.LP.calls = []
+        with self.renderer.frame():
+            for x in range(8):
+                for y in range(1, 9):
+                    self.renderer.setColor(x, y, ORANGE)
+        self.assertEqual([call[0] for call in self.LP.calls],
+                         ["LedFrameBegin", "LedCtrlRapidHome", "LedCtrlRawRapid", "LedFrameShow"])
+        leds = self.LP.calls[2][1]
+        self.assertEqual(leds, [ORANGE.code] * 64 + [YELLOW.code] * 8 + [OFF.code] * 8)
+
+    def test_draws_several_leds_as_one_frame(self):
+        board = HWBoard(VirtualBoard(maxx=6, maxy=6), self.LP, self.renderer)
+        with self.renderer.frame():
+            board.setColor(0, 0, RED)
+            board.setColor(1, 0, RED)
+        self.assertEqual(self.LP.calls[0], ("LedFrameBegin",))
+        self.assertEqual(self.LP.calls[-1], ("LedFrameShow",))
+        self.assertEqual(len(self.LP.calls), 4)
+
+
+class TimelineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.timeline = Timeline(lambda: self.now)
+        self.steps = []
+
+    def effect(self, name, delays):
+        try:
+            for delay in delays:
+                self.steps.append(name)
+                yield delay
+        finally:
+            self.steps.append(name + " done")
+
+    def test_runs_steps_when_due(self):
+        self.timeline.play(self.effect("a", [100, 50]))
+        self.assertEqual(self.steps, ["a"])
+        self.assertTrue(self.timeline.tick(99))
+        self.assertEqual(self.steps, ["a"])
+        self.assertTrue(self.timeline.tick(100))
+        self.assertFalse(self.timeline.tick(150))
+        self.assertEqual(self.steps, ["a", "a", "a done"])
+
+    def test_new_effect_on_a_key_cancels_the_old_one(self):
+        self.timeline.play(self.effect("a", [100]), "k")
+        self.timeline.play(self.effect("b", [100]), "k")
+        self.assertEqual(self.steps, ["a", "a done", "b"])
+
+    def test_queued_effect_starts_when_the_first_ends(self):
+        self.timeline.play(self.effect("a", [100]), "k")
+        self.timeline.play(self.effect("b", [100]), "k", queue=True)
+        self.timeline.tick(100)
+        self.assertEqual(self.steps, ["a", "a done", "b"])
+        self.timeline.cancel("k")
+        self.assertFalse(self.timeline.isRunning("k"))
+
+    def test_effect_without_steps(self):
+        self.timeline.play(self.effect("a", []), "k")
+        self.assertEqual(self.steps, ["a done"])
+        self.assertFalse(self.timeline.isRunning("k"))
+        self.assertFalse(self.timeline.tick(0))
+
+    def test_queued_effect_without_steps(self):
+        self.timeline.play(self.effect("a", [100]), "k")
+        self.timeline.play(self.effect("b", []), "k", queue=True)
+        self.timeline.play(self.effect("c", [100]), "k", queue=True)
+        self.assertTrue(self.timeline.tick(100))
+        self.assertEqual(self.steps, ["a", "a done", "b done", "c"])
+        self.assertFalse(self.timeline.tick(200))
+
+    def test_flash_does_not_block_and_ends_on_the_final_color(self):
+        LP = RecordingLaunchpad()
+        board = HWBoard(VirtualBoard(maxx=6, maxy=6), LP, timeline=self.timeline)
+        board.flashWithColor(1, 1, OFF, RED)
+        self.assertEqual(board.currentColor(1, 1), RED)
+        while self.timeline.tick(self.now):
+            self.now += 100
+        self.assertEqual(len(LP.calls), 7)
+        self.assertEqual(LP.calls[-1], ("LedCtrlXY", 1, 2, 3, 0))
+
+    def test_setting_a_flashing_square_stops_the_flash(self):
+        LP = RecordingLaunchpad()
+        board = HWBoard(VirtualBoard(maxx=6, maxy=6), LP, timeline=self.timeline)
+        board.flashWithColor(1, 1, OFF, RED)
+        board.setColor(1, 1, GREEN)
+        self.assertFalse(self.timeline.tick(1000))
+        self.assertEqual(LP.calls[-1], ("LedCtrlXY", 1, 2, 0, 3))
+
+    def test_cancelled_top_row_flash_ends_on_the_last_color(self):
+        LP = RecordingLaunchpad()
+        topRow = HWTopRow(LP, timeline=self.timeline)
+        topRow.flashAllWithColor([RED, GREEN])
+        self.timeline.tick(1000)    # all off
+        self.timeline.cancel('topRow')
+        leds = [call for call in LP.calls if call[0] == "LedCtrlXY"]
+        self.assertEqual(sorted(leds[-8:]), [("LedCtrlXY", x, 0, 0, 3) for x in range(8)])
+
+
 class SlimeWarsStrategyTests(unittest.TestCase):
 
     def setUp(self):
@@ -117,6 +489,16 @@ class SlimeWarsStrategyTests(unittest.TestCase):
         expectedSquare = Square(0,0,RED)
         self.assertTrue(expectedSquare in squares)
         
+    def test_two_players_start_in_opposite_corners(self):
+        board = VirtualBoard(maxx=6, maxy=6)
+        strategy = SlimeWarsStrategy(board, [RED, GREEN])
+        squares = strategy.initBoardSetup()
+        self.assertEqual(sorted((square.x, square.y) for square in squares if square.color is RED),
+                         [(0, 0), (0, 1), (1, 0)])
+        self.assertEqual(sorted((square.x, square.y) for square in squares if square.color is GREEN),
+                         [(4, 5), (5, 4), (5, 5)])
+        self.assertEqual(len(squares), 6)
+
     def test_captures_returns_opponents(self):
         color1 = ButtonColor(1,1)
         color2 = ButtonColor(2,2)
@@ -128,7 +510,114 @@ class SlimeWarsStrategyTests(unittest.TestCase):
 
         self.assertEqual(len(squares), 1)
 
+    def legalMovesByScan(self, player):
+        color = self.strategy.playerColorList[player]
+        moves = []
+        for empty in self.virtualBoard.squaresWithColor(OFF):
+            if self.strategy.calculateBoardUpdates(player, empty.x, empty.y):
+                moves.append((empty.x, empty.y, ()))
+            for square in self.virtualBoard.squaresWithColor(color):
+                if self.strategy.distance(empty.x, empty.y, square.x, square.y) == 2:
+                    moves.append((empty.x, empty.y, (square.x, square.y)))
+        return sorted(moves)
+
+    def play_random_moves(self, count):
+        rng = random.Random(3)
+        mover = Mover(self.virtualBoard)
+        [mover.apply(move) for move in self.strategy.initBoardSetup()]
+        for turn in range(count):
+            moves = list(self.strategy.legalMoves(turn % 4))
+            if moves:
+                move = rng.choice(moves)
+                [mover.apply(square) for square in
+                    self.strategy.boardUpdatesFor(turn % 4, move)]
+
+    def test_legal_moves_match_a_full_scan(self):
+        self.play_random_moves(30)
+        for player in range(4):
+            moves = sorted((move.x, move.y, move.source or ())
+                           for move in self.strategy.legalMoves(player))
+            self.assertEqual(moves, self.legalMovesByScan(player))
+
+    def test_legal_moves_give_the_same_updates(self):
+        self.play_random_moves(30)
+        for player in range(4):
+            for move in self.strategy.legalMoves(player):
+                self.assertEqual(
+                    self.strategy.boardUpdatesFor(player, move),
+                    self.strategy.calculateBoardUpdates(player, move.x, move.y, move.source))
+
+    def test_legal_moves_clone_each_square_once(self):
+        self.virtualBoard.setColor(3,3,RED)
+        self.virtualBoard.setColor(3,4,RED)
+        moves = [move for move in self.strategy.legalMoves(0) if not move.isJump()]
+        self.assertEqual(len(moves), 10)
+
+    def test_bitboard_gives_the_same_updates(self):
+        bitBoard = BitBoard()
+        bitStrategy = SlimeWarsStrategy(bitBoard, [RED, GREEN, YELLOW, ORANGE])
+        for strategy in [self.strategy, bitStrategy]:
+            for move in strategy.initBoardSetup():
+                Mover(strategy.board).apply(move)
+        self.assertEqual(bitStrategy.calculateBoardUpdates(0, 2, 0, (0, 0)),
+                         self.strategy.calculateBoardUpdates(0, 2, 0, (0, 0)))
+        self.assertEqual(bitStrategy.hasAValidMove(1), True)
+
+    def test_bitboard_generates_the_same_legal_moves(self):
+        bitBoard = BitBoard()
+        bitStrategy = SlimeWarsStrategy(bitBoard, [RED, GREEN, YELLOW, ORANGE])
+        squares = [(3, 3, RED), (3, 4, RED), (4, 4, GREEN), (2, 2, YELLOW), (6, 1, RED)]
+        for x, y, color in squares:
+            self.virtualBoard.setColor(x, y, color)
+            bitBoard.setColor(x, y, color)
+        for player in range(4):
+            self.assertEqual(sorted(str(move) for move in bitStrategy.legalMoves(player)),
+                             sorted(str(move) for move in self.strategy.legalMoves(player)))
+            self.assertEqual(bitStrategy.hasAValidMove(player),
+                             self.strategy.hasAValidMove(player))
+        self.assertTrue(bitStrategy.isValidMove(0, 4, 3, None))
+        self.assertFalse(bitStrategy.isValidMove(0, 0, 0, None))
+
         
         
+class HeadlessGameTests(unittest.TestCase):
+
+    def test_plays_scripted_presses_on_a_virtual_launchpad(self):
+        device = VirtualLaunchpad()
+        device.Click(1, 2)      # red clones into square (1, 1)
+        device.Click(8, 8)      # quit
+        main([], device)
+        self.assertEqual(device.Led(1, 2), RED.code)
+        self.assertEqual(device.Led(5, 1), GREEN.code)
+        self.assertEqual([device.Led(x, 0) for x in range(8)], [GREEN.code] * 8)
+        self.assertFalse(device.pending)
+
+    def test_quit_stops_a_computer_only_game(self):
+        setup = VirtualLaunchpad()
+        setup.Click(8, 8)
+        main([], setup)
+        device = VirtualLaunchpad()
+        device.Click(8, 8)
+        main([0, 1, 2, 3], device)
+        # stopped before the first move
+        self.assertEqual(device.Leds(), setup.Leds())
+
+    def test_presses_while_the_computer_thinks_are_dropped(self):
+        import mike_ai
+        device = VirtualLaunchpad()
+        chooseMove = mike_ai.AlphaBetaPlayer.chooseMove
+        def pressWhileThinking(player, board, seat):
+            device.Click(4, 2)      # a green clone, if it were read later
+            device.Click(8, 8)
+            return chooseMove(player, board, seat)
+        mike_ai.AlphaBetaPlayer.chooseMove = pressWhileThinking
+        try:
+            main([0], device)
+        finally:
+            mike_ai.AlphaBetaPlayer.chooseMove = chooseMove
+        self.assertEqual(device.Led(4, 2), OFF.code)
+        self.assertEqual([device.Led(x, 0) for x in range(8)], [GREEN.code] * 8)
+
+
 if __name__ == '__main__':
         unittest.main(exit=False)
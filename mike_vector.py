@@ -0,0 +1,212 @@
+#!/usr/bin/python
+
+#
+# Many SlimeWars games at once, for self-play and rule checks.
+#
+# VectorGames keeps N boards in one int8 array: 0 is empty, player p is
+# p + 1. Legal targets, captures, empty counts and the moves themselves
+# are computed for every game in the same numpy step, using shifted
+# copies of the boards instead of per-square Square/ButtonColor objects.
+#
+# The array is stored as [x, y, game], so every shift moves whole
+# contiguous rows of games at once; the boards property gives the usual
+# (N, maxx, maxy) view, indexed [game, x, y] like VirtualBoard.matrix.
+#
+# Requires numpy (the rest of the game does not).
+#
+
+import numpy as np
+
+from mike import PLAYER_COLORS, Mover, SlimeWarsStrategy, VirtualBoard
+
+
+def dilate(mask, distance):
+    # True wherever a True square lies within <distance>, itself included.
+    # Masks are [x, y, game]; shifted in place along x and then along y.
+    rows = mask.copy()
+    for d in range(1, distance + 1):
+        rows[d:] |= mask[:-d]
+        rows[:-d] |= mask[d:]
+    result = rows.copy()
+    for d in range(1, distance + 1):
+        result[:, d:] |= rows[:, :-d]
+        result[:, :-d] |= rows[:, d:]
+    return result
+
+
+def neighbourhoodSum(mask, distance):
+    # for every square, how many True squares lie within <distance> of
+    # it, not counting itself
+    mask = mask.astype(np.int8)
+    rows = mask.copy()
+    for d in range(1, distance + 1):
+        rows[d:] += mask[:-d]
+        rows[:-d] += mask[d:]
+    result = rows.copy()
+    for d in range(1, distance + 1):
+        result[:, d:] += rows[:, :-d]
+        result[:, :-d] += rows[:, d:]
+    return result - mask
+
+
+def randomArgmax(scores, rng):
+    # per game, the flat x * maxy + y index of a best square, ties broken
+    # at random. scores is a small non-negative int16 [x, y, game] array,
+    # -1 for squares that cannot be picked.
+    noise = rng.randint(0, 256, scores.shape, dtype=np.int16)
+    maxx, maxy, games = scores.shape
+    return np.argmax(((scores << 8) | noise).reshape(maxx * maxy, games), axis=0)
+
+
+class VectorGames:
+
+    def __init__(self, games, size = 6, players = 4, seed = None, maxMoves = 1000,
+                 recordHistory = False):
+        self.players = players
+        self.playerColorList = PLAYER_COLORS[:players]
+        self.maxMoves = maxMoves
+        self.rng = np.random.RandomState(seed)
+
+        # start from the same setup as the real game
+        board = VirtualBoard(maxx=size, maxy=size)
+        start = SlimeWarsStrategy(board, self.playerColorList)
+        [Mover(board).apply(square) for square in start.initBoardSetup()]
+        first = np.zeros((size, size, 1), np.int8)
+        for player, color in enumerate(self.playerColorList):
+            for square in board.squaresWithColor(color):
+                first[square.x, square.y] = player + 1
+
+        self.cells = np.repeat(first, games, axis=2)
+        self.toMove = np.zeros(games, np.int8)
+        self.done = np.zeros(games, bool)
+        self.moves = np.zeros(games, np.int32)
+        # per step: (moved, player, x, y, sourcex, sourcey) for every game,
+        # -1 where a game did not move and for the source of a clone
+        self.history = [] if recordHistory else None
+
+    @property
+    def boards(self):
+        return self.cells.transpose(2, 0, 1)
+
+    def ownMasks(self, players):
+        return self.cells == players + 1
+
+    def emptyCounts(self):
+        return (self.cells == 0).sum(axis=(0, 1))
+
+    def counts(self):
+        return np.stack([(self.cells == player + 1).sum(axis=(0, 1))
+                         for player in range(self.players)], axis=1)
+
+    def legalTargets(self, players = None):
+        # (clone targets, jump targets) for each game's player as
+        # (N, maxx, maxy) masks; a square can be in both
+        if players is None:
+            players = self.toMove
+        own = self.ownMasks(players)
+        empty = self.cells == 0
+        clones = empty & dilate(own, 1)
+        jumps = empty & (neighbourhoodSum(own, 2) > neighbourhoodSum(own, 1))
+        return clones.transpose(2, 0, 1), jumps.transpose(2, 0, 1)
+
+    def captureCounts(self, players = None):
+        # opponent squares adjacent to every square, (N, maxx, maxy)
+        if players is None:
+            players = self.toMove
+        opponents = (self.cells != 0) & ~self.ownMasks(players)
+        return neighbourhoodSum(opponents, 1).transpose(2, 0, 1)
+
+    def step(self, policy = "random"):
+        # one move in every unfinished game; returns how many were made.
+        # Finished games are left out of the arrays altogether.
+        active = np.nonzero(~self.done)[0]
+        if len(active) == 0:
+            return 0
+        everyGame = len(active) == len(self.done)
+        cells = self.cells if everyGame else self.cells[:, :, active]
+        maxx, maxy, games = cells.shape
+        player = self.toMove[active]
+        mark = player + 1
+        own = cells == mark
+        empty = cells == 0
+        # an empty square is never one of the player's own, so the
+        # dilations can include the square itself
+        clones = empty & dilate(own, 1)
+        reachable = empty & dilate(own, 2)
+
+        if policy == "greedy":
+            # the most captures, clones before jumps
+            opponents = ~empty & ~own
+            scores = neighbourhoodSum(opponents, 1).astype(np.int16) * 2 + clones
+        else:
+            # a random reachable square, cloned into when possible
+            scores = np.zeros(cells.shape, np.int16)
+        scores[~reachable] = -1
+        target = randomArgmax(scores, self.rng).astype(np.int16)
+        tx, ty = target // maxy, target % maxy
+        index = np.arange(games)
+        isClone = clones[tx, ty, index]
+
+        # distance of every square from each game's target
+        xs = np.arange(maxx, dtype=np.int16)[:, np.newaxis, np.newaxis]
+        ys = np.arange(maxy, dtype=np.int16)[np.newaxis, :, np.newaxis]
+        distance = np.maximum(np.abs(xs - tx), np.abs(ys - ty))
+        source = randomArgmax(np.where(own & (distance == 2), 0, -1).astype(np.int16),
+                              self.rng)
+        sx, sy = source // maxy, source % maxy
+        jumping = ~isClone
+
+        captured = (distance == 1) & ~empty & ~own
+        cells = np.where(captured, mark, cells).astype(np.int8)
+        cells[tx, ty, index] = mark
+        cells[sx[jumping], sy[jumping], index[jumping]] = 0
+        if everyGame:
+            self.cells = cells
+        else:
+            self.cells[:, :, active] = cells
+        self.moves[active] += 1
+
+        if self.history is not None:
+            moved = np.zeros(len(self.done), bool)
+            moved[active] = True
+            entry = [np.full(len(self.done), -1) for i in range(5)]
+            for values, column in zip([player, tx, ty, np.where(isClone, -1, sx),
+                                       np.where(isClone, -1, sy)], entry):
+                column[active] = values
+            self.history.append(tuple([moved] + entry))
+        self.advance(active, cells)
+        return len(active)
+
+    def advance(self, active, cells):
+        # next seat that can move, as SlimeWarsStrategy.nextPlayer does
+        empty = cells == 0
+        player = self.toMove[active]
+        nextPlayer = player.copy()
+        found = np.zeros(len(active), bool)
+        for offset in range(1, self.players + 1):
+            candidate = ((player + offset) % self.players).astype(np.int8)
+            canMove = (empty & dilate(cells == candidate + 1, 2)).any(axis=(0, 1)) & ~found
+            nextPlayer[canMove] = candidate[canMove]
+            found |= canMove
+        self.toMove[active] = nextPlayer
+        finished = ~empty.any(axis=(0, 1)) | ~found | (self.moves[active] >= self.maxMoves)
+        self.done[active] = finished
+
+    def run(self, policy = "random"):
+        total = 0
+        while not self.done.all():
+            total += self.step(policy)
+        return total
+
+    def winners(self):
+        counts = self.counts()
+        return counts == counts.max(axis=1)[:, np.newaxis]
+
+    def toVirtualBoard(self, game):
+        maxx, maxy, games = self.cells.shape
+        board = VirtualBoard(maxx=maxx, maxy=maxy)
+        for x in range(maxx):
+            for y in range(maxy):
+                if self.cells[x, y, game]:
+                    board.setColor(x, y, self.playerColorList[self.cells[x, y, game] - 1])
+        return board
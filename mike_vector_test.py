@@ -0,0 +1,77 @@
+import unittest
+
+from mike import *
+
+try:
+    import numpy
+    from mike_vector import *
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class VectorGamesTests(unittest.TestCase):
+
+    def replay(self, games, game):
+        # plays the recorded moves of one game through SlimeWarsStrategy
+        board = VirtualBoard(maxx=games.boards.shape[1], maxy=games.boards.shape[2])
+        strategy = SlimeWarsStrategy(board, games.playerColorList)
+        mover = Mover(board)
+        [mover.apply(square) for square in strategy.initBoardSetup()]
+        expectedPlayer = 0
+        for active, player, tx, ty, sx, sy in games.history:
+            if not active[game]:
+                continue
+            self.assertEqual(player[game], expectedPlayer)
+            source = None if sx[game] < 0 else (sx[game], sy[game])
+            updates = strategy.calculateBoardUpdates(player[game], tx[game], ty[game], source)
+            self.assertTrue(updates)
+            [mover.apply(square) for square in updates]
+            expectedPlayer = strategy.nextPlayer(player[game])
+        return board
+
+    def assertSameBoard(self, games, game, board):
+        vectorBoard = games.toVirtualBoard(game)
+        for x in range(board.maxx):
+            for y in range(board.maxy):
+                self.assertTrue(vectorBoard.currentColor(x, y) is board.currentColor(x, y))
+
+    def test_random_games_follow_the_rules(self):
+        games = VectorGames(20, size=6, seed=1, recordHistory=True)
+        games.run("random")
+        for game in range(0, 20, 5):
+            self.assertSameBoard(games, game, self.replay(games, game))
+
+    def test_greedy_games_follow_the_rules(self):
+        games = VectorGames(10, size=8, players=2, seed=2, recordHistory=True)
+        games.run("greedy")
+        for game in range(0, 10, 3):
+            self.assertSameBoard(games, game, self.replay(games, game))
+
+    def test_legal_targets_match_legal_moves(self):
+        games = VectorGames(3, size=6, seed=3)
+        for i in range(12):
+            games.step()
+        clones, jumps = games.legalTargets()
+        for game in range(3):
+            strategy = SlimeWarsStrategy(games.toVirtualBoard(game), games.playerColorList)
+            moves = list(strategy.legalMoves(games.toMove[game]))
+            self.assertEqual(set((move.x, move.y) for move in moves if not move.isJump()),
+                             set(zip(*numpy.nonzero(clones[game]))))
+            self.assertEqual(set((move.x, move.y) for move in moves if move.isJump()),
+                             set(zip(*numpy.nonzero(jumps[game]))))
+
+    def test_capture_counts_match_captures(self):
+        games = VectorGames(2, size=6, seed=4)
+        for i in range(10):
+            games.step()
+        counts = games.captureCounts()
+        board = games.toVirtualBoard(0)
+        strategy = SlimeWarsStrategy(board, games.playerColorList)
+        color = games.playerColorList[games.toMove[0]]
+        for x in range(6):
+            for y in range(6):
+                self.assertEqual(counts[0, x, y], len(strategy.captures(x, y, color)))
+
+
+if __name__ == '__main__':
+        unittest.main(exit=False)